@@ -0,0 +1,122 @@
+"""
+Micro-benchmark for the listing parser.
+
+Compares hardwax.listing_parser.parse_listing with the nested response.css() selector chain
+the section spiders used before, checks that both give the same tracks and prints pages/second.
+Pass saved Hardwax listing pages (.html or .html.gz files, or directories of them);
+without arguments a synthetic listing page is used.
+
+Usage (from the hardwax folder): python -m hardwax.bench_parser [fixtures ...] [--repeat 200]
+"""
+
+import argparse
+import gzip
+import time
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from hardwax.listing_parser import parse_listing
+
+
+def selector_chain(response):
+    """
+    The selector chain of the original section spiders, returning the same tuples as parse_listing.
+    """
+    rows = []
+    for li in response.css("li"):
+        div = li.css("div.qv")
+        a_elements = div.css("a")
+        if len(a_elements) >= 2:
+            label = a_elements[0].attrib["title"]
+            artist_album = a_elements[1].attrib.get("title", "")
+            if artist_album.count(":") == 1:
+                artist, album = artist_album.split(":")
+                label_issue = a_elements[1].css("::text").get()
+                for a in li.css("a.sa"):
+                    title = a.attrib.get("title", "")
+                    if title.count(":") == 1:
+                        track = title.split(":")[1]
+                        rows.append(
+                            (
+                                label.strip(),
+                                artist.strip(),
+                                album.strip(),
+                                label_issue.strip(),
+                                track.strip(),
+                            )
+                        )
+    return rows
+
+
+def synthetic_page(releases=40):
+    items = []
+    for n in range(releases):
+        tracks = "".join(
+            f'<a class="sa play" title="Artist {n}: A{t} Track {t}"><span>A{t}</span></a>'
+            for t in range(1, 5)
+        )
+        items.append(
+            f'<li class="release"><div class="qv rl"><a title=" Label {n % 9} " href="/label/{n}/">'
+            f'<img src="/c/{n}.jpg"></a><a title="Artist {n}: Album {n} (12&quot;)" href="/{n}/">'
+            f"\n  LBL {n:03d} <em>new</em></a></div><ul><li>{tracks}</li></ul>{tracks}</li>"
+        )
+    items.append('<li><div class="qv"><a title="x">a</a><a title="no colon">b</a></div></li>')
+    items.append('<li><div class="qv"><a title="x">a</a><a title="a:b:c">b</a></div></li>')
+    return (
+        "<html><body><nav><ul><li><a href='/'>Home</a></li></ul></nav>"
+        f"<ul class='listing'>{''.join(items)}</ul></body></html>"
+    ).encode()
+
+
+def load_pages(paths):
+    pages = []
+    for path in map(Path, paths):
+        files = sorted(path.glob("**/*.html*")) if path.is_dir() else [path]
+        for file in files:
+            data = file.read_bytes()
+            if file.suffix == ".gz":
+                data = gzip.decompress(data)
+            pages.append((file.name, data))
+    return pages
+
+
+def timed(func, responses, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for response in responses:
+            func(response)
+    return time.perf_counter() - start
+
+
+def fresh(body):
+    # A new response per call, so selector and lxml tree caching do not favour either parser
+    return HtmlResponse("https://hardwax.com/techno/?page=1", body=body, encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("fixtures", nargs="*")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures) if args.fixtures else [("synthetic", synthetic_page())]
+    for name, body in pages:
+        expected = selector_chain(fresh(body))
+        actual = list(parse_listing(fresh(body).selector.root))
+        status = "same output" if actual == expected else "OUTPUT DIFFERS"
+        print(f"{name}: {len(expected)} tracks, {status}")
+
+    bodies = [body for _, body in pages]
+    chain = timed(lambda body: selector_chain(fresh(body)), bodies, args.repeat)
+    lxml = timed(lambda body: list(parse_listing(fresh(body).selector.root)), bodies, args.repeat)
+    # Building the response and parsing the HTML is the same for both
+    base = timed(lambda body: fresh(body).selector.root, bodies, args.repeat)
+    total = len(bodies) * args.repeat
+    print(f"{'parser':<16} {'pages/s':>9} {'ms/page excl. HTML parse':>26}")
+    for name, elapsed in (("selector chain", chain), ("listing_parser", lxml)):
+        print(f"{name:<16} {total / elapsed:>9.0f} {1000 * (elapsed - base) / total:>26.3f}")
+
+
+if __name__ == "__main__":
+    main()
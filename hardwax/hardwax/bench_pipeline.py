@@ -0,0 +1,76 @@
+"""
+Throughput benchmark for the PostgreSQL item pipelines.
+
+Feeds synthetic items through PostgreSQLPipeline (one INSERT and commit per item) and
+BufferedPostgreSQLPipeline (COPY into a staging table + one INSERT ... SELECT per flush).
+Both write into a scratch schema, so the real music_albums table is not touched.
+
+Usage (from the hardwax folder): python -m hardwax.bench_pipeline [--items 20000]
+"""
+
+import argparse
+import time
+
+import scrapy
+
+from hardwax.pipelines import BufferedPostgreSQLPipeline, PostgreSQLPipeline
+
+SCHEMA = "bench_pipeline"
+
+
+def make_items(count):
+    return [
+        {
+            "artist": f"Artist {i % 500}",
+            "album": f"Album {i // 4}",
+            "label": f"Label {i % 50}",
+            "label_issue": f"LBL{i // 4:05d}",
+            "track": f"A{i % 4 + 1}. Track {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def run(pipeline, items, spider):
+    pipeline.cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    pipeline.cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    pipeline.cursor.execute(f"SET search_path TO {SCHEMA}")
+    pipeline.connection.commit()
+    pipeline.open_spider(spider)
+    start = time.perf_counter()
+    for item in items:
+        pipeline.process_item(item, spider)
+    if hasattr(pipeline, "flush"):
+        pipeline.flush(spider)
+    elapsed = time.perf_counter() - start
+    pipeline.cursor.execute("SELECT count(*) FROM music_albums")
+    rows = pipeline.cursor.fetchone()[0]
+    pipeline.cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    pipeline.connection.commit()
+    pipeline.close_spider(spider)
+    return elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--buffer-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    spider = scrapy.Spider(name="bench")
+    items = make_items(args.items)
+    pipelines = [
+        ("PostgreSQLPipeline", PostgreSQLPipeline()),
+        (
+            f"BufferedPostgreSQLPipeline ({args.buffer_size})",
+            BufferedPostgreSQLPipeline(buffer_size=args.buffer_size, flush_interval=3600),
+        ),
+    ]
+    print(f"{'pipeline':<36} {'seconds':>8} {'items/s':>9} {'rows':>7}")
+    for name, pipeline in pipelines:
+        elapsed, rows = run(pipeline, items, spider)
+        print(f"{name:<36} {elapsed:>8.2f} {len(items) / elapsed:>9.0f} {rows:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Database access shared by the pipelines and the spiders.
+
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+import os
+
+load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
+
+host = os.getenv("DB_HOST")
+user = os.getenv("DB_USER")
+password = os.getenv("DB_PASSWORD")
+dbname = os.getenv("DB_NAME")
+
+
+def connect():
+    return psycopg2.connect(
+        host=host,
+        user=user,
+        password=password,
+        dbname=dbname,  # connect to the scrapy_hardwax database
+    )
+
+
+def load_known_releases(genres):
+    """
+    Return {genre: {(artist, album), ...}} for the releases already stored in music_albums.
+    """
+    known = {genre: set() for genre in genres}
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('music_albums')")
+            if cursor.fetchone()[0] is None:
+                return known
+            cursor.execute(
+                "SELECT DISTINCT genre, artist, album FROM music_albums WHERE genre = ANY(%s)",
+                (list(genres),),
+            )
+            for genre, artist, album in cursor:
+                known[genre].add((artist, album))
+    finally:
+        connection.close()
+    return known
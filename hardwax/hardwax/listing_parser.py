@@ -0,0 +1,51 @@
+# Parser for Hardwax listing pages.
+#
+# Works directly on the lxml tree behind a Scrapy response with precompiled
+# XPath expressions, instead of building a SelectorList for every <li>, <div>
+# and <a>. The output is the same as the nested response.css() chain the
+# spiders used before.
+
+from lxml import etree
+
+_QV = "[@class and contains(concat(' ', normalize-space(@class), ' '), ' qv ')]"
+_SA = "[@class and contains(concat(' ', normalize-space(@class), ' '), ' sa ')]"
+
+_count_qv_divs = etree.XPath(f"count(//div{_QV})")
+_list_items = etree.XPath("//li")
+_qv_divs = etree.XPath(f".//div{_QV}")
+_links = etree.XPath(".//a")
+_track_links = etree.XPath(f".//a{_SA}")
+_first_text = etree.XPath("(descendant-or-self::text())[1]")
+
+
+def count_listing_divs(root):
+    """
+    Return the number of <div class="qv"> release blocks on the page.
+    """
+    return int(_count_qv_divs(root))
+
+
+def parse_listing(root):
+    """
+    Yield (label, artist, album, label_issue, track) for every track on a listing page.
+    `root` is the lxml root of the page, e.g. response.selector.root.
+    """
+    for li in _list_items(root):
+        a_elements = [a for div in _qv_divs(li) for a in _links(div)]
+        if len(a_elements) < 2:
+            continue
+        label = a_elements[0].attrib["title"]
+        artist_album = a_elements[1].get("title", "")
+        # Only process the element if title contains exactly one colon
+        if artist_album.count(":") != 1:
+            continue
+        artist, album = artist_album.split(":")
+        artist, album, label = artist.strip(), album.strip(), label.strip()
+        text = _first_text(a_elements[1])
+        label_issue = text[0] if text else None
+        for a in _track_links(li):
+            title = a.get("title", "")
+            # Only process the element if title contains exactly one colon
+            if title.count(":") != 1:
+                continue
+            yield label, artist, album, label_issue.strip(), title.split(":")[1].strip()
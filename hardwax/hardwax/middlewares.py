@@ -3,7 +3,14 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import gzip
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse, TextResponse
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -101,3 +108,66 @@ class HardwaxDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+def corpus_path(corpus_dir, url):
+    """
+    Return the corpus file for a URL, e.g. section_reggae_page_3.html.gz for /section/reggae/?page=3.
+    """
+    parts = urlsplit(url)
+    name = re.sub(r"[^A-Za-z0-9-]+", "_", f"{parts.path}?{parts.query}").strip("_")
+    return Path(corpus_dir) / f"{name or 'index'}.html.gz"
+
+
+class CorpusRecorderMiddleware:
+    # Saves every successfully fetched page to the compressed corpus in CORPUS_DIR.
+    # Pages are stored as UTF-8, since the response headers are not kept.
+    # Enabled with CORPUS_RECORD = True.
+
+    def __init__(self, corpus_dir):
+        self.corpus_dir = Path(corpus_dir)
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("CORPUS_RECORD"):
+            raise NotConfigured
+        return cls(crawler.settings.get("CORPUS_DIR", "corpus"))
+
+    def process_response(self, request, response, spider):
+        if (
+            response.status == 200
+            and isinstance(response, TextResponse)
+            and "replay" not in response.flags
+        ):
+            corpus_path(self.corpus_dir, response.url).write_bytes(
+                gzip.compress(response.text.encode("utf-8"))
+            )
+        return response
+
+
+class ReplayDownloaderMiddleware:
+    # Serves requests from the corpus in CORPUS_DIR instead of the network.
+    # Pages missing from the corpus get a 404, so pagination ends there.
+    # Enabled with CORPUS_REPLAY = True.
+
+    def __init__(self, corpus_dir):
+        self.corpus_dir = Path(corpus_dir)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("CORPUS_REPLAY"):
+            raise NotConfigured
+        return cls(crawler.settings.get("CORPUS_DIR", "corpus"))
+
+    def process_request(self, request, spider):
+        path = corpus_path(self.corpus_dir, request.url)
+        if not path.exists():
+            return HtmlResponse(request.url, status=404, request=request, flags=["replay"])
+        return HtmlResponse(
+            request.url,
+            body=gzip.decompress(path.read_bytes()),
+            encoding="utf-8",
+            request=request,
+            flags=["replay"],
+        )
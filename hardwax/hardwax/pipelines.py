@@ -5,28 +5,17 @@
 
 
 # useful for handling different item types with a single interface
+import io
+import time
 import psycopg2
 from scrapy.exceptions import DropItem
-from pathlib import Path
-from dotenv import load_dotenv
-import os
 
-load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
-
-host = os.getenv("DB_HOST")
-user = os.getenv("DB_USER")
-password = os.getenv("DB_PASSWORD")
-dbname = os.getenv("DB_NAME")
+from hardwax.database import connect
 
 
 class PostgreSQLPipeline(object):
     def __init__(self):
-        self.connection = psycopg2.connect(
-            host=host,
-            user=user,
-            password=password,
-            dbname=dbname,  # connect to the scrapy_hardwax database
-        )
+        self.connection = connect()
         self.connection.autocommit = True
         self.cursor = self.connection.cursor()
 
@@ -60,7 +49,7 @@ class PostgreSQLPipeline(object):
                 item.get("album"),
                 item.get("label"),
                 item.get("label_issue"),
-                spider.name,
+                item.get("genre", spider.name),
                 item.get("track"),
             ),
         )
@@ -70,3 +59,139 @@ class PostgreSQLPipeline(object):
     def close_spider(self, spider):
         self.cursor.close()
         self.connection.close()
+
+
+class BufferedPostgreSQLPipeline(PostgreSQLPipeline):
+    """
+    Collects items in memory and writes them in bulk.
+    Each flush COPYs the buffer into a temporary staging table and moves it into music_albums
+    with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING, in one transaction.
+    A flush happens when POSTGRES_BUFFER_SIZE items are buffered, when POSTGRES_FLUSH_INTERVAL
+    seconds have passed since the last flush, and when the spider closes.
+    """
+
+    columns = ("artist", "album", "label", "label_issue", "genre", "track")
+
+    def __init__(self, buffer_size=1000, flush_interval=10.0):
+        super().__init__()
+        self.connection.autocommit = False
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            buffer_size=crawler.settings.getint("POSTGRES_BUFFER_SIZE", 1000),
+            flush_interval=crawler.settings.getfloat("POSTGRES_FLUSH_INTERVAL", 10.0),
+        )
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS music_albums_staging (
+                artist TEXT,
+                album TEXT,
+                label TEXT,
+                label_issue TEXT,
+                genre TEXT,
+                track TEXT
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+        self.connection.commit()
+
+    def process_item(self, item, spider):
+        self.buffer.append(
+            (
+                item.get("artist"),
+                item.get("album"),
+                item.get("label"),
+                item.get("label_issue"),
+                item.get("genre", spider.name),
+                item.get("track"),
+            )
+        )
+        if (
+            len(self.buffer) >= self.buffer_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush(spider)
+        return item
+
+    def flush(self, spider):
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        data = io.StringIO()
+        for row in self.buffer:
+            data.write("\t".join(_copy_value(value) for value in row))
+            data.write("\n")
+        data.seek(0)
+        columns = ", ".join(self.columns)
+        try:
+            self.cursor.copy_expert(
+                f"COPY music_albums_staging ({columns}) FROM STDIN", data
+            )
+            self.cursor.execute(
+                f"""
+                INSERT INTO music_albums ({columns})
+                SELECT {columns} FROM music_albums_staging
+                ON CONFLICT (artist, album, genre, track) DO NOTHING
+                """
+            )
+            self.connection.commit()
+            spider.logger.info("Flushed %d items to music_albums", len(self.buffer))
+        except psycopg2.Error as e:
+            self.connection.rollback()
+            spider.logger.warning(
+                "Failed to flush %d items, inserting them one by one: %s", len(self.buffer), e
+            )
+            self._insert_rows(spider)
+        self.buffer.clear()
+
+    def _insert_rows(self, spider):
+        """
+        Insert the buffer row by row, so a bad value only loses its own item.
+        """
+        columns = ", ".join(self.columns)
+        failed = 0
+        for row in self.buffer:
+            try:
+                self.cursor.execute(
+                    f"""
+                    INSERT INTO music_albums ({columns})
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (artist, album, genre, track) DO NOTHING
+                    """,
+                    row,
+                )
+                self.connection.commit()
+            except (psycopg2.Error, ValueError) as e:
+                self.connection.rollback()
+                failed += 1
+                spider.logger.error("Failed to insert item %r: %s", row, e)
+        spider.logger.info(
+            "Inserted %d of %d items to music_albums one by one", len(self.buffer) - failed, len(self.buffer)
+        )
+
+    def close_spider(self, spider):
+        self.flush(spider)
+        super().close_spider(spider)
+
+
+def _copy_value(value):
+    """
+    Format a value for COPY's text format.
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
@@ -0,0 +1,69 @@
+"""
+Replays a recorded corpus through the hardwax spider, without the network.
+
+Record a corpus once with a normal crawl:
+    scrapy crawl hardwax -s CORPUS_RECORD=true -s CORPUS_DIR=corpus
+Then replay it as often as needed:
+    python -m hardwax.replay_crawl --corpus corpus [--sections techno] [--db] [--output items.jl]
+
+Prints pages and items per second. --db also runs the database pipeline, otherwise only parsing is timed.
+--output writes the scraped items sorted as JSON lines, so the output of two versions of the
+scraper can be compared with diff.
+"""
+
+import argparse
+import json
+import time
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default="corpus")
+    parser.add_argument("--sections")
+    parser.add_argument("--db", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    settings.set("CORPUS_REPLAY", True)
+    settings.set("CORPUS_RECORD", False)
+    settings.set("CORPUS_DIR", args.corpus)
+    settings.set("LOG_LEVEL", "WARNING")
+    if not args.db:
+        settings.set("ITEM_PIPELINES", {})
+
+    items = []
+    pages = []
+
+    def item_scraped(item):
+        items.append(dict(item))
+
+    def response_received(response):
+        pages.append(response.status)
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler("hardwax")
+    crawler.signals.connect(item_scraped, signal=signals.item_scraped)
+    crawler.signals.connect(response_received, signal=signals.response_received)
+    process.crawl(crawler, sections=args.sections)
+    start = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - start
+
+    replayed = sum(1 for status in pages if status == 200)
+    print(
+        f"{replayed} pages, {len(items)} items in {elapsed:.2f}s: "
+        f"{replayed / elapsed:.0f} pages/s, {len(items) / elapsed:.0f} items/s"
+    )
+    if args.output:
+        lines = sorted(json.dumps(item, sort_keys=True, ensure_ascii=False) for item in items)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,5 @@ from scrapy.utils.project import get_project_settings
 
 
 process = CrawlerProcess(get_project_settings())
-process.crawl("last-week")
-process.crawl("this-week")
+process.crawl("hardwax", weekly=True)
 process.start()
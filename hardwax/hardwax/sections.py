@@ -0,0 +1,78 @@
+# The Hardwax sections that are scraped.
+#
+# Every section is crawled by the generic HardwaxSpider. The slug is also stored
+# as the genre of the scraped tracks, section_url marks the sections that live
+# under /section/<slug>/ instead of /<slug>/, weekly marks the sections crawled
+# by run_weekly_spiders.py and concurrency is the number of requests that may
+# run at the same time for that section.
+
+from typing import NamedTuple
+
+
+class Section(NamedTuple):
+    slug: str
+    section_url: bool = False
+    weekly: bool = False
+    concurrency: int = 2
+
+    def page_url(self, page):
+        if self.section_url:
+            return f"https://hardwax.com/section/{self.slug}/?page={page}"
+        return f"https://hardwax.com/{self.slug}/?page={page}"
+
+    @property
+    def download_slot(self):
+        return f"hardwax.com/{self.slug}"
+
+
+SECTIONS = [
+    Section("ambient"),
+    Section("back-in-stock"),
+    Section("basic-channel"),
+    Section("chicago-oldschool"),
+    Section("collectors-items"),
+    Section("colundi-everyone"),
+    Section("detroit-house"),
+    Section("detroit"),
+    Section("digital"),
+    Section("disco", section_url=True),
+    Section("drexciya"),
+    Section("drum-n-bass"),
+    Section("electro"),
+    Section("electronica"),
+    Section("electronic", section_url=True),
+    Section("essentials"),
+    Section("exclusives"),
+    Section("grime"),
+    Section("honest-jons"),
+    Section("house", concurrency=4),
+    Section("irdial-discs"),
+    Section("labels", section_url=True),
+    Section("last-week", weekly=True),
+    Section("mego"),
+    Section("new-global-styles"),
+    Section("outernational", section_url=True),
+    Section("reggae", section_url=True, concurrency=4),
+    Section("reissues"),
+    Section("surgeon"),
+    Section("techno", concurrency=4),
+    Section("this-week", weekly=True),
+    Section("wave", section_url=True),
+]
+
+
+def select_sections(slugs=None, weekly=False):
+    """
+    Return the sections to crawl: the given comma separated slugs,
+    only the weekly sections, or every section.
+    """
+    if slugs:
+        by_slug = {section.slug: section for section in SECTIONS}
+        wanted = [slug.strip() for slug in slugs.split(",") if slug.strip()]
+        unknown = [slug for slug in wanted if slug not in by_slug]
+        if unknown:
+            raise ValueError(f"Unknown Hardwax sections: {', '.join(unknown)}")
+        return [by_slug[slug] for slug in wanted]
+    if weekly:
+        return [section for section in SECTIONS if section.weekly]
+    return list(SECTIONS)
@@ -19,6 +19,11 @@ NEWSPIDER_MODULE = "hardwax.spiders"
 # Obey robots.txt rules
 ROBOTSTXT_OBEY = False
 
+# Number of listing pages requested ahead per section by the hardwax spider
+PAGINATION_WINDOW = 4
+# Stop paginating a section at the first page whose releases are all in music_albums already
+INCREMENTAL_CRAWL = False
+
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
 # CONCURRENT_REQUESTS = 32
 
@@ -53,6 +58,16 @@ ROBOTSTXT_OBEY = False
 # DOWNLOADER_MIDDLEWARES = {
 #    "hardwax.middlewares.HardwaxDownloaderMiddleware": 543,
 # }
+# The corpus middlewares only switch on when CORPUS_RECORD / CORPUS_REPLAY is set.
+# The recorder sits below HttpCompressionMiddleware (590) so it stores decompressed pages.
+DOWNLOADER_MIDDLEWARES = {
+    "hardwax.middlewares.ReplayDownloaderMiddleware": 50,
+    "hardwax.middlewares.CorpusRecorderMiddleware": 100,
+}
+# Record fetched listing pages to CORPUS_DIR, or replay them from it without the network
+CORPUS_DIR = "corpus"
+CORPUS_RECORD = False
+CORPUS_REPLAY = False
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -62,7 +77,10 @@ ROBOTSTXT_OBEY = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-ITEM_PIPELINES = {"hardwax.pipelines.PostgreSQLPipeline": 300}
+ITEM_PIPELINES = {"hardwax.pipelines.BufferedPostgreSQLPipeline": 300}
+# Items buffered by BufferedPostgreSQLPipeline before a bulk write, and the longest time between writes
+POSTGRES_BUFFER_SIZE = 1000
+POSTGRES_FLUSH_INTERVAL = 10.0
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
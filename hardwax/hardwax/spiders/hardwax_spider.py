@@ -0,0 +1,129 @@
+import scrapy
+
+from hardwax.database import load_known_releases
+from hardwax.listing_parser import count_listing_divs, parse_listing
+from hardwax.sections import select_sections
+
+
+class HardwaxSpider(scrapy.Spider):
+    """
+    Crawls any number of Hardwax sections in one crawler.
+
+    scrapy crawl hardwax                         every section
+    scrapy crawl hardwax -a sections=techno,disco
+    scrapy crawl hardwax -a weekly=true          only the weekly sections
+
+    Pages are requested speculatively: a window of PAGINATION_WINDOW pages (or -a window=K)
+    is kept in flight per section, and the window stops growing at the first page without releases.
+
+    With -a incremental=true (or INCREMENTAL_CRAWL) the releases already in music_albums are loaded
+    first, and a section stops paginating at the first page that only has known releases.
+    """
+
+    name = "hardwax"
+    allowed_domains = ["hardwax.com"]
+
+    def __init__(
+        self, sections=None, weekly=False, window=None, incremental=None, *args, **kwargs
+    ):
+        super(HardwaxSpider, self).__init__(*args, **kwargs)
+        self.sections = select_sections(sections, _is_true(weekly))
+        self.window = int(window) if window else None
+        self.incremental = None if incremental is None else _is_true(incremental)
+        # Per section: the (artist, album) pairs already stored, only loaded in incremental mode
+        self.known_releases = {}
+        # Per section: the highest page requested so far and the first page found empty
+        self.last_requested = {}
+        self.end_page = {}
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(HardwaxSpider, cls).from_crawler(crawler, *args, **kwargs)
+        # Every section gets its own download slot, so its concurrency can be tuned separately.
+        # Slots already configured in DOWNLOAD_SLOTS take precedence over the section table.
+        slots = dict(crawler.settings.getdict("DOWNLOAD_SLOTS"))
+        for section in spider.sections:
+            slots.setdefault(section.download_slot, {"concurrency": section.concurrency})
+        crawler.settings.set("DOWNLOAD_SLOTS", slots, priority="spider")
+        if spider.window is None:
+            spider.window = crawler.settings.getint("PAGINATION_WINDOW", 4)
+        if spider.incremental is None:
+            spider.incremental = crawler.settings.getbool("INCREMENTAL_CRAWL", False)
+        return spider
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.incremental:
+            self.known_releases = load_known_releases([section.slug for section in self.sections])
+            self.logger.info(
+                "Incremental crawl, %d known releases",
+                sum(len(known) for known in self.known_releases.values()),
+            )
+        for section in self.sections:
+            self.last_requested[section.slug] = 0
+            yield from self.extend_window(section, 1)
+
+    def extend_window(self, section, page):
+        """
+        Request the pages up to page + window - 1 that have not been requested yet,
+        unless the end of the section has already been found.
+        """
+        end = self.end_page.get(section.slug)
+        while self.last_requested[section.slug] < page + self.window - 1:
+            next_page = self.last_requested[section.slug] + 1
+            if end is not None and next_page >= end:
+                break
+            self.last_requested[section.slug] = next_page
+            yield self.page_request(section, next_page)
+
+    def page_request(self, section, page):
+        return scrapy.Request(
+            section.page_url(page),
+            self.parse,
+            cb_kwargs={"section": section, "page": page},
+            meta={"download_slot": section.download_slot},
+            # Lower pages first, so the window moves forward in order
+            priority=-page,
+        )
+
+    def parse(self, response, section, page):
+        print("URL:", response.url)
+        root = response.selector.root
+        divs = count_listing_divs(root)
+        print("Number of divs found:", divs)
+        if divs:
+            data_found = False
+            new_release_found = False
+            known = self.known_releases.get(section.slug)
+            for label, artist, album, label_issue, track in parse_listing(root):
+                if known is not None and (artist, album) not in known:
+                    new_release_found = True
+                yield {
+                    "artist": artist,
+                    "album": album,
+                    "label": label,
+                    "label_issue": label_issue,
+                    "track": track,
+                    "genre": section.slug,
+                }
+                data_found = True
+            if data_found and known is not None and not new_release_found:
+                # Everything from here on is already stored
+                self.set_end_page(section, page + 1)
+                return
+            if data_found:
+                yield from self.extend_window(section, page + 1)
+                return
+        self.set_end_page(section, page)
+
+    def set_end_page(self, section, page):
+        end = self.end_page.get(section.slug)
+        if end is None or page < end:
+            self.end_page[section.slug] = page
+
+
+def _is_true(value):
+    return str(value).lower() in ("1", "true", "yes")
@@ -1,19 +1,29 @@
 import os
 import csv
+import queue
 import re
+import threading
 import time
-import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 
 import psycopg2
-import spotipy
 from dotenv import load_dotenv
-from fuzzywuzzy import fuzz
-from psycopg2 import sql, OperationalError
-from psycopg2.extras import DictCursor, execute_values
-from spotipy.oauth2 import SpotifyOAuth
+from psycopg2 import sql
+from psycopg2.extras import DictCursor, NamedTupleCursor, execute_values
+
+from catalogue_index import CatalogueIndex
+from checkpoint import Checkpoint
+from normalize import normalize, normalize_stats
+from db import Database
+from records import Album, Track
+from search_cache import SearchCache
+
+# spotipy, the rate limiter (which needs spotipy and requests) and the matcher (numpy, rapidfuzz)
+# are imported where they are first needed, so database-only scripts start without loading them.
 
 
 class SpotifyClass:
@@ -25,71 +35,130 @@ class SpotifyClass:
         self.dbpassword = os.getenv("DB_PASSWORD")
         self.dbhost = os.getenv("DB_HOST")
         self.dbport = os.getenv("DB_PORT")
-        try:
-            self.conn = psycopg2.connect(
-                dbname=self.dbname,
-                user=self.dbuser,
-                password=self.dbpassword,
-                host=self.dbhost,
-                port=self.dbport,
-            )
-            cur = self.conn.cursor()  # Create a cursor object
-            cur.execute("SELECT 1")  # Execute a simple query
-            print("Database connected")
-        except OperationalError as e:
-            print(f"The error '{e}' occurred")
 
         # load the environment variables for the spotipy library
         self.spotipy_client_id = os.getenv("CLIENT_ID")
         self.spotipy_client_secret = os.getenv("CLIENT_SECRET")
         self.spotipy_redirect_uri = "https://127.0.0.1:8085"
-        self.auth_manager = SpotifyOAuth(
-            client_id=self.spotipy_client_id,
-            client_secret=self.spotipy_client_secret,
-            redirect_uri=self.spotipy_redirect_uri,
-            scope="playlist-modify-public",  # add the playlist-modify-public scope
-        )
-        self.sp = spotipy.Spotify(auth_manager=self.auth_manager)
-        # Start the authorization process
-        self.sp.me()
+
+        # The connection pool, the Spotify client, the user ID and the search cache are created on first use
+        self._init_lock = threading.RLock()
+        self._db = None
+        self._sp = None
+        self._user_id = None
+        self._search_cache = None
         # Define the variables
-        self.spotify_data_albums = []
-        self.music_albums_all = []
         self.music_albums_unique = None
-        self.album_results = []
+        self.catalogue_index = None
+        self.playlists = None
+
+    @property
+    def db(self) -> Database:
+        """
+        The connection pool of the jobs; nothing is connected until the first query.
+        """
+        if self._db is None:
+            with self._init_lock:
+                if self._db is None:
+                    self._db = Database(
+                        size=int(os.getenv("DB_POOL_SIZE", "10")),
+                        dbname=self.dbname,
+                        user=self.dbuser,
+                        password=self.dbpassword,
+                        host=self.dbhost,
+                        port=self.dbport,
+                    )
+        return self._db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
+    @property
+    def sp(self):
+        """
+        The Spotify client, created and authorized on first use.
+        """
+        if self._sp is None:
+            with self._init_lock:
+                if self._sp is None:
+                    import spotipy
+                    from spotipy.oauth2 import SpotifyOAuth
+
+                    from rate_limiter import RateLimitedSpotify, RateLimiter, make_session
+
+                    self.auth_manager = SpotifyOAuth(
+                        client_id=self.spotipy_client_id,
+                        client_secret=self.spotipy_client_secret,
+                        redirect_uri=self.spotipy_redirect_uri,
+                        scope="playlist-modify-public",  # add the playlist-modify-public scope
+                    )
+                    # All API calls share one rate limiter, which also retries 429 responses
+                    self.rate_limiter = RateLimiter(rate=float(os.getenv("SPOTIFY_RATE_LIMIT", "10")))
+                    sp = RateLimitedSpotify(
+                        spotipy.Spotify(auth_manager=self.auth_manager, requests_session=make_session()),
+                        self.rate_limiter,
+                    )
+                    # Start the authorization process here, before worker threads share the client
+                    self._user_id = sp.me()["id"]
+                    self._sp = sp
+        return self._sp
+
+    @sp.setter
+    def sp(self, sp):
+        self._sp = sp
+
+    @property
+    def user_id(self) -> str:
+        """
+        The Spotify ID of the current user, fetched once.
+        """
+        if self._user_id is None:
+            with self._init_lock:
+                if self._user_id is None:
+                    self._user_id = self.sp.me()["id"]
+        return self._user_id
+
+    @property
+    def search_cache(self):
+        """
+        The on-disk cache of raw search responses, so re-runs do not repeat the same queries.
+        """
+        if self._search_cache is None:
+            with self._init_lock:
+                if self._search_cache is None:
+                    self._search_cache = SearchCache(
+                        os.getenv(
+                            "SEARCH_CACHE_PATH", Path(__file__).resolve().parent.parent / "search_cache.sqlite3"
+                        ),
+                        ttl=float(os.getenv("SEARCH_CACHE_TTL_DAYS", "30")) * 24 * 3600,
+                    )
+        return self._search_cache
+
+    @search_cache.setter
+    def search_cache(self, search_cache):
+        self._search_cache = search_cache
 
     def print_all_databases(self):
         try:
-            cur = self.conn.cursor()
-            cur.execute("SELECT datname FROM pg_database;")
-            rows = cur.fetchall()
+            with self.db.transaction() as cur:
+                cur.execute("SELECT datname FROM pg_database;")
+                rows = cur.fetchall()
 
             for row in rows:
                 print("Database name: ", row[0])
         except (Exception, psycopg2.DatabaseError) as error:
             print(error)
-        finally:
-            if cur is not None:
-                cur.close()
 
     @staticmethod
     def _normalize(text: str) -> str:
-        """Normalize a string for better Spotify search matching."""
-        # Decompose unicode and strip accent marks
-        text = unicodedata.normalize("NFKD", text)
-        text = "".join(c for c in text if not unicodedata.combining(c))
-        # Remove parenthetical suffixes like (Deluxe Edition), (Remaster), (12")
-        text = re.sub(r"\s*\(.*?\)\s*", " ", text)
-        # Remove bracketed suffixes like [Remastered]
-        text = re.sub(r"\s*\[.*?\]\s*", " ", text)
-        # Collapse whitespace
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
+        """Normalize a string for better Spotify search matching (cached, see normalize.py)."""
+        return normalize(text)
 
     def ensure_spotify_data_table_exists(self):
         try:
             print("Ensuring spotify_data_albums table exists...")
-            with self.conn.cursor(cursor_factory=DictCursor) as cur:
+            with self.db.transaction(cursor_factory=DictCursor) as cur:
                 cur.execute(
                     """
                     SELECT EXISTS (
@@ -99,11 +168,11 @@ class SpotifyClass:
                     """
                 )
                 result = cur.fetchone()
-                if result[0]:
-                    print("Table spotify_data_albums exists")
-                    return True
-                else:
-                    self.create_spotify_data_table_album()
+            if result[0]:
+                print("Table spotify_data_albums exists")
+                return True
+            else:
+                self.create_spotify_data_table_album()
         except Exception as e:
             print(f"Error in ensuring table exists: {e}")
 
@@ -121,222 +190,445 @@ class SpotifyClass:
                 UNIQUE(id, artist, album)
             );
             """
-            with self.conn.cursor() as cur:
+            with self.db.transaction() as cur:
                 cur.execute(create_table_query)
-            self.conn.commit()
             print("Table spotify_data_albums ensured to exist successfully")
         except Exception as e:
             print(f"Error in creating table: {e}")
 
-    def get_spotify_data_albums(self):
+    def _stream(self, query, params=None, chunk_size: int = 2000) -> Iterator[tuple]:
         """
-        Get the data from the songs table in the database.
+        Yield the rows of a query as namedtuples through a named server-side cursor.
+        Rows are fetched chunk_size at a time, so memory stays flat however big the table is.
+        The cursor reads on a pooled connection of its own, so the caller can commit its writes
+        during the iteration.
         """
-        try:
-            cur = self.conn.cursor()
-            cur.execute("SELECT * FROM spotify_data_albums ORDER BY id DESC")
-            self.spotify_data_albums = cur.fetchall()
-        except Exception as e:
-            print(f"Error in getting spotify data songs: {e}")
+        return self.db.stream(query, params, chunk_size)
 
-    def get_music_albums(self):
+    def get_spotify_data_albums(self) -> Iterator[Album]:
         """
-        Get the data from the albums table in the database.
+        Stream the albums found on Spotify, newest first.
         """
-        try:
-            cur = self.conn.cursor()
-            cur.execute("SELECT * FROM music_albums")
-            colnames = [desc[0] for desc in cur.description]
-            rows = cur.fetchall()
-            for row in rows:
-                self.music_albums_all.append(dict(zip(colnames, row)))
-            return self.music_albums_all
-        except Exception as e:
-            print(f"Error in getting music albums: {e}")
+        rows = self._stream(
+            "SELECT id, artist, album, album_uri, artist_uri FROM spotify_data_albums ORDER BY id DESC"
+        )
+        return (Album(*row) for row in rows)
+
+    def get_music_albums(self) -> Iterator[tuple]:
+        """
+        Stream the scraped tracks from the albums table in the database.
+        """
+        return self._stream(
+            "SELECT id, artist, album, label, label_issue, genre, track FROM music_albums"
+        )
 
     def make_unique_music_albums_table(self):
         """
         Update the unique music albums table.
+        Runs on the server and only looks at the music_albums rows added since the previous update:
+        the highest id that was already processed is kept in the etl_state table.
+        For every new (artist, album) the row with the lowest id is used.
         """
         try:
-            cur = self.conn.cursor()
-            cur.execute(
-                """
-                SELECT DISTINCT ON (artist, album) * FROM music_albums
-                """
-            )
-            column = [description[0] for description in cur.description]
-            distinct_music_albums = [dict(zip(column, row)) for row in cur.fetchall()]
-            cur.execute(
-                """CREATE TABLE IF NOT EXISTS music_albums_unique( 
-                id INT PRIMARY KEY,
-                checked BOOLEAN DEFAULT FALSE,
-                artist VARCHAR(255),
-                album VARCHAR(255),
-                UNIQUE(artist, album)
+            with self.db.transaction() as cur:
+                cur.execute(
+                    """CREATE TABLE IF NOT EXISTS music_albums_unique(
+                    id INT PRIMARY KEY,
+                    checked BOOLEAN DEFAULT FALSE,
+                    artist VARCHAR(255),
+                    album VARCHAR(255),
+                    UNIQUE(artist, album)
+                    )
+                    """
                 )
-                """
-            )
-            self.conn.commit()
-            for album in distinct_music_albums:
                 cur.execute(
+                    """CREATE TABLE IF NOT EXISTS etl_state(
+                    name TEXT PRIMARY KEY,
+                    value BIGINT NOT NULL
+                    )
                     """
-                    INSERT INTO music_albums_unique (id, artist, album) VALUES (%s, %s, %s)
-                    ON CONFLICT (artist, album) DO NOTHING
-                    """,
-                    (
-                        album["id"],
-                        album["artist"],
-                        album["album"],
-                    ),
                 )
-            self.conn.commit()
+                # Lock the high-water mark so two runs do not process the same rows
+                cur.execute(
+                    """
+                    INSERT INTO etl_state (name, value) VALUES ('music_albums_unique', 0)
+                    ON CONFLICT (name) DO UPDATE SET value = etl_state.value
+                    RETURNING value
+                    """
+                )
+                high_water_mark = cur.fetchone()[0]
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM music_albums")
+                max_id = cur.fetchone()[0]
+                if max_id > high_water_mark:
+                    cur.execute(
+                        """
+                        INSERT INTO music_albums_unique (id, artist, album)
+                        SELECT DISTINCT ON (artist, album) id, artist, album
+                        FROM music_albums
+                        WHERE id > %s AND id <= %s
+                        ORDER BY artist, album, id
+                        ON CONFLICT DO NOTHING
+                        """,
+                        (high_water_mark, max_id),
+                    )
+                    print(f"Added {cur.rowcount} albums to music_albums_unique")
+                    cur.execute(
+                        "UPDATE etl_state SET value = %s WHERE name = 'music_albums_unique'",
+                        (max_id,),
+                    )
         except Exception as e:
             print(f"Error in updating music albums: {e}")
 
     def get_unique_music_albums(self):
         """
-        Fetch from the music_albums_unique table and return as a dict
+        Update music_albums_unique and stream the albums that were not searched yet.
+        """
+        self.make_unique_music_albums_table()
+        self.music_albums_unique = self.select_unchecked("music_albums_unique")
+
+    def _find_best_match(
+        self,
+        items,
+        album: str,
+        artist: str,
+        threshold: int = 70,
+        norm_album: str = None,
+        norm_artist: str = None,
+    ):
+        """
+        Score search results and return the best match above the threshold.
+        All results are scored in one batch; pass norm_album/norm_artist (normalized and lower-cased)
+        to reuse the query strings across searches.
+        """
+        if norm_album is None:
+            norm_album = self._normalize(album).lower()
+        if norm_artist is None:
+            norm_artist = self._normalize(artist).lower()
+        result_albums = [self._normalize(item["name"]).lower() for item in items]
+        result_artists = [self._normalize(item["artists"][0]["name"]).lower() for item in items]
+        from matcher import best_match
+
+        return best_match(
+            items, norm_album, norm_artist, result_albums, result_artists, threshold
+        )
+
+    @staticmethod
+    def _ordered_map(
+        func: Callable[[Any], Any], items: Iterable[Any], workers: int
+    ) -> Iterator[Tuple[Any, Any]]:
+        """
+        Yield (item, func(item)) pairs in input order, running up to `workers` calls at once.
+        At most 2 * workers calls are in flight so large inputs are not submitted all at once.
+        """
+        if workers <= 1:
+            for item in items:
+                yield item, func(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for item in items:
+                pending.append((item, pool.submit(func, item)))
+                if len(pending) >= workers * 2:
+                    done_item, future = pending.popleft()
+                    yield done_item, future.result()
+            while pending:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+
+    def _search(self, q: str, type: str = "album", market: str = "BE") -> Dict[str, Any]:
+        """
+        Run a Spotify search, serving it from the search cache when a fresh response is stored.
+        """
+        key = self._normalize(q).lower()
+        results = self.search_cache.get(key, type, market)
+        if results is None:
+            results = self.sp.search(q=q, type=type, market=market)
+            self.search_cache.put(key, type, market, results)
+        return results
+
+    def _search_album_match(self, music_album):
+        """
+        Run the primary and fallback searches for one album.
+        Rate limits are retried by self.rate_limiter; returns None if the search still failed.
         """
+        from spotipy.exceptions import SpotifyException
+
+        album = music_album.album
+        artist = music_album.artist
+        norm_album = self._normalize(album)
+        norm_artist = self._normalize(artist)
+        # Lower-cased once and reused for scoring both searches
+        query_album = norm_album.lower()
+        query_artist = norm_artist.lower()
+
         try:
-            self.make_unique_music_albums_table()
-            cur = self.conn.cursor()
-            cur.execute(
-                """
-            SELECT * from music_albums_unique WHERE checked = False
-            """
+            # Artists we already resolved are matched against their discography, without searching
+            discography = (
+                self.catalogue_index.discography(artist) if self.catalogue_index else None
             )
-            column = [description[0] for description in cur.description]
-            self.music_albums_unique = [
-                dict(zip(column, row)) for row in cur.fetchall()
-            ]
+            if discography:
+                # Every album of a discography has the same artist, so the combined score would accept
+                # another release of that artist; only albums with the same normalized title count
+                candidates = [
+                    item for item in discography if self._normalize(item["name"]).lower() == query_album
+                ]
+                match, score = self._find_best_match(
+                    candidates, album, artist,
+                    norm_album=query_album, norm_artist=query_artist,
+                )
+                if match is not None:
+                    self.catalogue_index.record_hit()
+                    return match, score
+
+            # Primary search using Spotify field syntax
+            results = self._search(f"album:{norm_album} artist:{norm_artist}")
+            match, score = self._find_best_match(
+                results["albums"]["items"], album, artist,
+                norm_album=query_album, norm_artist=query_artist,
+            )
+
+            # Fallback: broad search without field syntax
+            if match is None:
+                results = self._search(f"{norm_artist} {norm_album}")
+                match, score = self._find_best_match(
+                    results["albums"]["items"], album, artist,
+                    norm_album=query_album, norm_artist=query_artist,
+                )
+
+            return match, score
+        except SpotifyException as e:
+            print(f"Error occurred while searching for album: {e}")
+            return None
+
+    def build_catalogue_index(self) -> CatalogueIndex:
+        """
+        Create the catalogue index, seeded with the artists already resolved in spotify_data_albums.
+        """
+        index = CatalogueIndex(self.sp)
+        try:
+            with self.db.transaction() as cur:
+                cur.execute(
+                    """
+                    SELECT DISTINCT ON (artist) artist, artist_uri FROM spotify_data_albums
+                    WHERE artist_uri IS NOT NULL
+                    """
+                )
+                for artist, artist_uri in cur.fetchall():
+                    index.add_artist(artist, artist_uri)
+            print(f"Catalogue index seeded with {len(index.artist_uris)} artists")
         except Exception as e:
-            print("Error in get_unique_music_albums:", e)
-
-    def _find_best_match(self, items, album: str, artist: str, threshold: int = 70):
-        """Score search results and return the best match above the threshold."""
-        norm_album = self._normalize(album).lower()
-        norm_artist = self._normalize(artist).lower()
-        best, best_score = None, 0
-        for item in items:
-            result_album = self._normalize(item["name"]).lower()
-            result_artist = self._normalize(item["artists"][0]["name"]).lower()
-            score = (fuzz.ratio(norm_album, result_album) + fuzz.ratio(norm_artist, result_artist)) / 2
-            if score > best_score:
-                best, best_score = item, score
-        if best_score >= threshold:
-            return best, best_score
-        return None, best_score
-
-    def search_album(self) -> Dict[str, Any]:
+            print(f"Error in build_catalogue_index: {e}")
+        return index
+
+    def search_album(self, concurrency: int = 1, use_catalogue_index: bool = True) -> Dict[str, Any]:
         """
         Search for an album on Spotify by its name and artist, and returns the artist_uri and album_uri.
         Uses fuzzy matching to validate results and a fallback broad search.
-        Batches DB writes for performance.
+        With use_catalogue_index, albums by artists that were already resolved are first matched
+        against the artist's discography, which saves the searches for repeat artists.
+        Up to `concurrency` albums are searched at once; results are handled in input order,
+        so without the catalogue index the output is the same as a sequential run.
+        Found albums and the checked status are committed together in checkpoints,
+        so an interrupted run continues with the albums that were not committed yet.
         """
-        not_found = []
-        checked_ids = []
-        batch_size = 50
-
-        for music_album in self.music_albums_unique:
-            album = music_album["album"]
-            artist = music_album["artist"]
-            album_id = music_album["id"]
-            norm_album = self._normalize(album)
-            norm_artist = self._normalize(artist)
-
-            while True:
-                try:
-                    # Primary search using Spotify field syntax
-                    results = self.sp.search(
-                        q=f"album:{norm_album} artist:{norm_artist}", type="album", market="BE"
-                    )
-                    match, score = self._find_best_match(results["albums"]["items"], album, artist)
-
-                    # Fallback: broad search without field syntax
-                    if match is None:
-                        results = self.sp.search(
-                            q=f"{norm_artist} {norm_album}", type="album", market="BE"
-                        )
-                        match, score = self._find_best_match(results["albums"]["items"], album, artist)
-
-                    if match is not None:
-                        music_album_with_uri = {
-                            **music_album,
-                            "album_uri": match["uri"],
-                            "artist_uri": match["artists"][0]["uri"],
-                        }
-                        self.album_results.append(music_album_with_uri)
-                        print(f"Album found (score {score:.0f}): {album} by {artist}")
-                    else:
-                        not_found.append((album, artist))
-                        print(f"Album not found: {album} by {artist}")
-
-                    checked_ids.append(album_id)
-
-                    # Batch flush every batch_size albums
-                    if len(checked_ids) >= batch_size:
-                        self.save_to_database_album()
-                        self._batch_update_checked("music_albums_unique", checked_ids)
-                        checked_ids.clear()
+        if use_catalogue_index:
+            self.catalogue_index = self.build_catalogue_index()
+
+        with Checkpoint(self._commit_album_batch) as checkpoint:
+            for music_album, outcome in self._ordered_map(
+                self._search_album_match, self.music_albums_unique, concurrency
+            ):
+                if outcome is None:
+                    continue
+                album = music_album.album
+                artist = music_album.artist
+                match, score = outcome
+
+                if match is not None:
+                    music_album.album_uri = match["uri"]
+                    music_album.artist_uri = match["artists"][0]["uri"]
+                    if self.catalogue_index:
+                        self.catalogue_index.add_artist(artist, music_album.artist_uri)
+                    print(f"Album found (score {score:.0f}): {album} by {artist}")
+                else:
+                    print(f"Album not found: {album} by {artist}")
+                checkpoint.add(music_album.id, [music_album])
 
-                    break
-                except spotipy.exceptions.SpotifyException as e:
-                    if e.http_status == 429:
-                        print("Rate limit exceeded. Waiting...")
-                        time.sleep(int(e.headers["Retry-After"]))
-                        continue
-                    else:
-                        print(f"Error occurred while searching for album: {e}")
-                        break
+        print(f"Committed {checkpoint.committed} albums")
+        print(
+            f"Search cache: {self.search_cache.hits} hits, {self.search_cache.misses} misses"
+        )
+        if self.catalogue_index:
+            print(
+                f"Catalogue index: {self.catalogue_index.hits} albums matched without searching, "
+                f"{len(self.catalogue_index.discographies)} discographies fetched"
+            )
+        stats = normalize_stats()
+        print(
+            f"Normalize cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate, {stats['size']} entries)"
+        )
 
-        # Final flush for remaining items
-        if checked_ids:
-            self.save_to_database_album()
-            self._batch_update_checked("music_albums_unique", checked_ids)
+    def _commit_album_batch(self, albums: List[Album], checked_ids):
+        """
+        Save the found albums of a checkpoint and mark all of its albums as checked in one transaction.
+        Albums that were not found are appended to the CSV once the transaction is committed.
+        Returns whether the transaction was committed.
+        """
+        found = [album for album in albums if album.album_uri]
+        try:
+            with self.db.transaction() as cur:
+                self.save_to_database_album(found, cur)
+                self._batch_update_checked("music_albums_unique", checked_ids, cur)
+        except Exception as e:
+            print(f"Error in saving album checkpoint: {e}")
+            return False
+        not_found = [(album.album, album.artist) for album in albums if not album.album_uri]
         if not_found:
             self.save_to_csv(not_found)
+        return True
 
-    def search_track(self, spotify_data_albums):
+    def search_track(
+        self, spotify_data_albums: Iterable[Album], batch_size: int = 20, queue_size: int = 100
+    ):
         """
-        Search for all the tracks in the albums that we have.
-        Batches checked-status updates for performance.
+        Search for all the tracks in the albums that we have and save them to spotify_data_songs.
+        Albums are fetched `batch_size` at a time (max 20) through the multi-album endpoint,
+        only albums with more tracks than the first page need extra requests.
+        The fetched tracks go through a queue of at most `queue_size` albums to a writer thread,
+        which commits them together with the checked status of their albums in checkpoints.
+        Fetching and writing overlap, memory is bounded by the queue, and an interrupted run
+        continues with the albums that were not committed yet.
+        Returns the list of errors.
         """
         errors = []
-        checked_ids = []
+        self.make_spotify_data_songs_table()
+        pending = queue.Queue(maxsize=queue_size)
+        checkpoint = Checkpoint(self._commit_track_batch)
+        failure = []
+        writer = threading.Thread(
+            target=self._track_writer, args=(pending, checkpoint, failure), daemon=True
+        )
+        writer.start()
+        try:
+            for album_tracks in self._fetch_tracks(spotify_data_albums, batch_size, errors):
+                if not self._put_while_alive(pending, album_tracks, writer):
+                    break
+        finally:
+            # Also on errors and Ctrl-C: let the writer commit what was fetched so far
+            self._put_while_alive(pending, None, writer)
+            writer.join()
+            if failure:
+                raise failure[0]
 
-        for album in spotify_data_albums:
-            album_uri = album["album_uri"]
+        print(f"Committed the tracks of {checkpoint.committed} albums")
+        return errors
+
+    @staticmethod
+    def _put_while_alive(pending: queue.Queue, item, writer: threading.Thread) -> bool:
+        """
+        Put an item on the queue, waiting while it is full.
+        Returns False instead of blocking for good once the writer thread has stopped.
+        """
+        while writer.is_alive():
+            try:
+                pending.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
+    @staticmethod
+    def _track_writer(pending: queue.Queue, checkpoint: Checkpoint, failure: list):
+        """
+        Take (album, tracks) pairs from the queue until None and commit them in checkpoints.
+        An error is kept in `failure`, so search_track can raise it in the main thread.
+        """
+        try:
+            with checkpoint:
+                while True:
+                    album_tracks = pending.get()
+                    if album_tracks is None:
+                        break
+                    album, tracks = album_tracks
+                    checkpoint.add(album.id, tracks)
+        except BaseException as e:
+            failure.append(e)
+
+    def _fetch_tracks(
+        self, spotify_data_albums: Iterable[Album], batch_size: int, errors: List[str]
+    ) -> Iterator[Tuple[Album, List[Track]]]:
+        """
+        Yield (album, tracks) for every album whose tracks could be fetched.
+        """
+        batch = []
+        for album in spotify_data_albums:
             # Extract the album ID from the URI
-            album_id_match = re.search(r"spotify:album:(\w+)", album_uri)
+            album_id_match = re.search(r"spotify:album:(\w+)", album.album_uri)
             if not album_id_match:
                 continue
 
-            spotify_album_id = album_id_match.group(1)
+            batch.append((album, album_id_match.group(1)))
+            if len(batch) >= batch_size:
+                yield from self._search_track_batch(batch, errors)
+                batch = []
 
-            try:
-                tracks = self.get_album_tracks(spotify_album_id)
-                print(f"Fetched {len(tracks)} tracks from album {spotify_album_id}")
-                album["searched_tracks"] = tracks
-                checked_ids.append(album["id"])
-
-                if len(checked_ids) >= 50:
-                    self._batch_update_checked("spotify_data_albums", checked_ids)
-                    checked_ids.clear()
-            except spotipy.exceptions.SpotifyException as e:
-                if e.http_status == 429:
-                    print("Rate limit exceeded. Waiting...")
-                    time.sleep(int(e.headers["Retry-After"]))
-                else:
-                    errors.append(str(e))
-            except Exception as e:
-                errors.append(str(e))
+        if batch:
+            yield from self._search_track_batch(batch, errors)
+
+    def _search_track_batch(self, batch, errors) -> Iterator[Tuple[Album, List[Track]]]:
+        """
+        Fetch the tracks for one batch of (album, spotify_album_id) pairs.
+        """
+        try:
+            batch_tracks = self.get_albums_tracks([spotify_album_id for _, spotify_album_id in batch])
+        except Exception as e:
+            errors.append(str(e))
+            return
+
+        for (album, spotify_album_id), tracks in zip(batch, batch_tracks):
+            if tracks is None:
+                errors.append(f"Album {spotify_album_id} was not returned by Spotify")
+                continue
+            print(f"Fetched {len(tracks)} tracks from album {spotify_album_id}")
+            yield album, [Track.from_spotify(album, track) for track in tracks]
 
-        if checked_ids:
-            self._batch_update_checked("spotify_data_albums", checked_ids)
+    def _commit_track_batch(self, tracks: List[Track], checked_ids):
+        """
+        Save the tracks of a checkpoint and mark their albums as checked in one transaction.
+        Returns whether the transaction was committed.
+        """
+        try:
+            with self.db.transaction() as cur:
+                self._insert_tracks(cur, tracks)
+                self._batch_update_checked("spotify_data_albums", checked_ids, cur)
+        except Exception as e:
+            print(f"Error in saving track checkpoint: {e}")
+            return False
+        return True
 
-        return spotify_data_albums, errors
+    def get_albums_tracks(self, album_ids):
+        """
+        Get all tracks of up to 20 albums with one multi-album request.
+        Returns a list of track lists in the order of album_ids, None for albums Spotify did not return.
+        Only albums with more tracks than fit on the first page are paginated.
+        """
+        results = self.sp.albums(album_ids)
+        albums_tracks = []
+        for album in results["albums"]:
+            if album is None:
+                albums_tracks.append(None)
+                continue
+            page = album["tracks"]
+            tracks = [{"name": track["name"], "id": track["id"]} for track in page["items"]]
+            while page["next"]:
+                page = self.sp.next(page)
+                tracks.extend(
+                    {"name": track["name"], "id": track["id"]} for track in page["items"]
+                )
+            albums_tracks.append(tracks)
+        return albums_tracks
 
     def get_album_tracks(self, album_id):
         """
@@ -359,78 +651,62 @@ class SpotifyClass:
         Makes the spotify_data_songs table
         """
         try:
-            cur = self.conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS spotify_data_songs (
-                    id VARCHAR(255),
-                    track VARCHAR(255),
-                    track_id VARCHAR(255) UNIQUE,
-                    artist VARCHAR(255),
-                    album VARCHAR(255),
-                    album_uri VARCHAR(255),
-                    artist_uri VARCHAR(255),
-                    genre VARCHAR(255),
-                    UNIQUE(track, track_id)
+            with self.db.transaction() as cur:
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS spotify_data_songs (
+                        id VARCHAR(255),
+                        track VARCHAR(255),
+                        track_id VARCHAR(255) UNIQUE,
+                        artist VARCHAR(255),
+                        album VARCHAR(255),
+                        album_uri VARCHAR(255),
+                        artist_uri VARCHAR(255),
+                        genre VARCHAR(255),
+                        UNIQUE(track, track_id)
+                    )
+                    """
                 )
-                """
-            )
-            self.conn.commit()
         except Exception as e:
             print(f"Error in making spotify_data_songs table: {e}")
 
-    def save_to_spotify_data_songs(self, spotify_data_albums):
+    def save_to_spotify_data_songs(self, tracks: List[Track]):
         """
         Save the track results to the database using batch inserts.
         """
         try:
             self.make_spotify_data_songs_table()
-            rows = []
-            for album in spotify_data_albums:
-                if "searched_tracks" not in album:
-                    continue
-                artist = album.get("artist")
-                album_name = album.get("album")
-                artist_uri = album.get("artist_uri")
-                album_uri = album.get("album_uri")
-                album_id = album.get("id")
-                for track in album["searched_tracks"]:
-                    rows.append((
-                        album_id,
-                        track.get("name"),
-                        track.get("id"),
-                        artist,
-                        album_name,
-                        album_uri,
-                        artist_uri,
-                    ))
-            if rows:
-                with self.conn.cursor() as cur:
-                    execute_values(
-                        cur,
-                        """
-                        INSERT INTO spotify_data_songs (id, track, track_id, artist, album, album_uri, artist_uri)
-                        VALUES %s
-                        ON CONFLICT (track_id) DO NOTHING
-                        """,
-                        rows,
-                        page_size=500,
-                    )
-                self.conn.commit()
-                print(f"Inserted {len(rows)} tracks into spotify_data_songs")
+            if tracks:
+                with self.db.transaction() as cur:
+                    self._insert_tracks(cur, tracks)
+                print(f"Inserted {len(tracks)} tracks into spotify_data_songs")
         except Exception as e:
             print(f"Error in saving to database: {e}")
 
-    def select_id(self, table_name):
+    @staticmethod
+    def _insert_tracks(cur, tracks: Iterable[Track]):
+        """
+        Insert tracks into spotify_data_songs on the given cursor, without committing.
+        """
+        rows = [track.row() for track in tracks]
+        if rows:
+            execute_values(
+                cur,
+                """
+                INSERT INTO spotify_data_songs (id, track, track_id, artist, album, album_uri, artist_uri)
+                VALUES %s
+                ON CONFLICT (track_id) DO NOTHING
+                """,
+                rows,
+                page_size=500,
+            )
+
+    def select_id(self, table_name) -> Iterator[int]:
         """
-        Gets the ID of all the rows in a table
+        Stream the ID of all the rows in a table
         """
-        cur = self.conn.cursor()
-        cur.execute(f"SELECT * FROM {table_name}")
-        rows = cur.fetchall()
-        # Extract the first element of each tuple and add it to a set
-        ids = [row[0] for row in rows]
-        return ids
+        for row in self._stream(sql.SQL("SELECT id FROM {}").format(sql.Identifier(table_name))):
+            yield row.id
 
     def reset_not_found(self, album_ids):
         """
@@ -439,31 +715,33 @@ class SpotifyClass:
         if not album_ids:
             return
         try:
-            cur = self.conn.cursor()
-            cur.execute(
-                "UPDATE music_albums_unique SET checked = False WHERE id != ALL(%s)",
-                (album_ids,),
-            )
-            self.conn.commit()
+            with self.db.transaction() as cur:
+                cur.execute(
+                    "UPDATE music_albums_unique SET checked = False WHERE id != ALL(%s)",
+                    (album_ids,),
+                )
         except Exception as e:
             print("Error in reset_not_found:", e)
 
-    def _batch_update_checked(self, table: str, album_ids: list):
+    def _batch_update_checked(self, table: str, album_ids: list, cur=None):
         """
         Batch-update checked status for multiple albums in one query.
+        With a cursor the update becomes part of the caller's transaction and is not committed here.
         """
         if not album_ids:
             return
         allowed_tables = {"music_albums_unique", "spotify_data_albums"}
         if table not in allowed_tables:
             raise ValueError(f"Invalid table name: {table}")
-        try:
-            cur = self.conn.cursor()
+        if cur is not None:
             cur.execute(
                 f"UPDATE {table} SET checked = True WHERE id = ANY(%s)",
                 (album_ids,),
             )
-            self.conn.commit()
+            return
+        try:
+            with self.db.transaction() as cur:
+                self._batch_update_checked(table, album_ids, cur)
         except Exception as e:
             print(f"Error in _batch_update_checked: {e}")
 
@@ -486,226 +764,288 @@ class SpotifyClass:
         except Exception as e:
             print(f"Error in saving to CSV: {e}")
 
-    def save_to_database_album(self):
+    def save_to_database_album(self, albums: List[Album], cur=None):
         """
-        Save the album results to the database.
+        Save the album results to the database with one multi-row insert per 500 albums.
+        With a cursor the inserts become part of the caller's transaction and are not committed here.
         """
-        try:
-            with self.conn.cursor() as cur:
-                for album in self.album_results:
-                    if "artist_uri" in album and "album_uri" in album:
-                        id = album.get("id", None)
-                        artist = album.get("artist", None)
-                        album_name = album.get("album", None)
-                        artist_uri = album["artist_uri"]
-                        album_uri = album["album_uri"]
-
-                        cur.execute(
-                            sql.SQL(
-                                """
-                                INSERT INTO spotify_data_albums (id, artist, album, album_uri, artist_uri)
-                                VALUES (%s, %s, %s, %s, %s)
-                                ON CONFLICT (id) DO NOTHING;
-                                """
-                            ),
-                            (
-                                id,
-                                artist,
-                                album_name,
-                                album_uri,
-                                artist_uri,
-                            ),
-                        )
-                self.conn.commit()
-        except Exception as e:
-            print(f"Error in saving to database: {e}")
+        if cur is None:
+            try:
+                with self.db.transaction() as cur:
+                    self.save_to_database_album(albums, cur)
+            except Exception as e:
+                print(f"Error in saving to database: {e}")
+            return
+        rows = [
+            (album.id, album.artist, album.album, album.album_uri, album.artist_uri)
+            for album in albums
+            if album.artist_uri and album.album_uri
+        ]
+        if rows:
+            execute_values(
+                cur,
+                """
+                INSERT INTO spotify_data_albums (id, artist, album, album_uri, artist_uri)
+                VALUES %s
+                ON CONFLICT (id) DO NOTHING
+                """,
+                rows,
+                page_size=500,
+            )
 
-    def select_table_dict(self, table_name):
+    # Columns that the search steps read from the tables with a checked flag
+    UNCHECKED_COLUMNS = {
+        "music_albums_unique": ("id", "artist", "album"),
+        "spotify_data_albums": ("id", "artist", "album", "album_uri", "artist_uri"),
+    }
+
+    def _unchecked_query(self, table_name, select):
+        if table_name not in self.UNCHECKED_COLUMNS:
+            raise ValueError(f"Invalid table name: {table_name}")
+        return sql.SQL("SELECT {} FROM {} WHERE checked = False").format(
+            select, sql.Identifier(table_name)
+        )
+
+    def select_unchecked(self, table_name) -> Iterator[Album]:
         """
-        Select the whole table and return it as a dictionary
+        Stream the albums of a table that were not checked yet, ordered by id.
         """
-        try:
-            cur = self.conn.cursor()
-            cur.execute(f"SELECT * FROM {table_name} WHERE checked = False")
-            column = [description[0] for description in cur.description]
-            result = [dict(zip(column, row)) for row in cur.fetchall()]
-            return result
-        except Exception as e:
-            print(f"Error in select_table_dict: {e}")
+        columns = sql.SQL(", ").join(map(sql.Identifier, self.UNCHECKED_COLUMNS[table_name]))
+        rows = self._stream(
+            self._unchecked_query(table_name, columns) + sql.SQL(" ORDER BY id")
+        )
+        return (Album(*row) for row in rows)
+
+    def has_unchecked(self, table_name) -> bool:
+        """
+        Return whether a table has rows that were not checked yet.
+        """
+        with self.db.transaction() as cur:
+            cur.execute(
+                sql.SQL("SELECT EXISTS ({})").format(
+                    self._unchecked_query(table_name, sql.SQL("1"))
+                )
+            )
+            return cur.fetchone()[0]
 
     def add_genre_playlist(self):
         """
         Add the genre of spotify_data_song to each item and add it to the spotify_data_songs table.
         """
-        cursor = self.conn.cursor()
-
+        update_genres = """
+            UPDATE spotify_data_songs
+            SET genre = music_albums.genre
+            FROM music_albums
+            WHERE spotify_data_songs.id::text = music_albums.id::text
+            AND spotify_data_songs.genre IS NULL
+            """
         try:
             print("Updating genres...")
             # Update the genre of songs in one SQL query
-            cursor.execute(
-                """
-                UPDATE spotify_data_songs
-                SET genre = music_albums.genre
-                FROM music_albums
-                WHERE spotify_data_songs.id::text = music_albums.id::text
-                AND spotify_data_songs.genre IS NULL
-                """
-            )
+            with self.db.transaction() as cur:
+                cur.execute(update_genres)
             print("Genres updated successfully.")
-            self.conn.commit()  # Commit after updating genres
         except psycopg2.errors.UniqueViolation:
-            print("UniqueViolation error occurred. Rolling back...")
-            self.conn.rollback()
-            print("Deleting conflicting rows...")
-            cursor.execute(
-                """
-                DELETE FROM spotify_data_songs
-                WHERE id IN (
-                    SELECT spotify_data_songs.id
-                    FROM spotify_data_songs
-                    JOIN music_albums ON spotify_data_songs.id::text = music_albums.id::text
-                    WHERE spotify_data_songs.genre = music_albums.genre
-                    AND spotify_data_songs.genre IS NULL
+            print("UniqueViolation error occurred. Rolled back.")
+            # Delete the conflicting rows and update the genres again in one transaction
+            with self.db.transaction() as cur:
+                print("Deleting conflicting rows...")
+                cur.execute(
+                    """
+                    DELETE FROM spotify_data_songs
+                    WHERE id IN (
+                        SELECT spotify_data_songs.id
+                        FROM spotify_data_songs
+                        JOIN music_albums ON spotify_data_songs.id::text = music_albums.id::text
+                        WHERE spotify_data_songs.genre = music_albums.genre
+                        AND spotify_data_songs.genre IS NULL
+                    )
+                    """
                 )
-                """
-            )
-            print("Conflicting rows deleted. Updating genres again...")
-            self.conn.commit()  # Commit after deleting conflicting rows
-            cursor.execute(
-                """
-                UPDATE spotify_data_songs
-                SET genre = music_albums.genre
-                FROM music_albums
-                WHERE spotify_data_songs.id::text = music_albums.id::text
-                AND spotify_data_songs.genre IS NULL
-                """
-            )
+                print("Conflicting rows deleted. Updating genres again...")
+                cur.execute(update_genres)
             print("Genres updated successfully after resolving conflicts.")
-            self.conn.commit()  # Commit after updating genres again
 
         print("Changes committed to the database.")
 
-    def get_songs_split_by_genre(self):
-        cursor = self.conn.cursor()
-
-        # Test the database connection
-        cursor.execute("SELECT 1")
-        if not cursor.fetchone()[0]:
-            print("Failed to connect to the database.")
-            return
-
-        # Fetch all rows from the spotify_data_songs table and order them by id
-        cursor.execute("SELECT * FROM spotify_data_songs ORDER BY id")
-
-        # Initialize the songs_by_genre and genre_counts dictionaries
-        songs_by_genre = {}
-        genre_counts = {}
-
-        chunk_count = 0
-        while True:
-            # Fetch a chunk of songs
-            songs = cursor.fetchmany(1000)
-            if not songs:
-                break
-
-            chunk_count += 1
-            print(f"Processing chunk {chunk_count}...")
-
-            # Convert the rows to dictionaries
-            columns = [desc[0] for desc in cursor.description]
-            songs = [dict(zip(columns, song)) for song in songs]
-
-            # Split the songs by genre
-            for song in songs:
-                genre = song["genre"]
-                if genre not in songs_by_genre:
-                    songs_by_genre[genre] = []
-                    genre_counts[genre] = 1
-                else:
-                    genre_counts[genre] += 1
-
-                # If the number of songs for a genre exceeds 11000, create a new genre category
-                if genre_counts[genre] > 11000:
-                    count = genre_counts[genre] // 11000
-                    new_genre = f"{genre}_{count}"
-                    if new_genre not in songs_by_genre:
-                        songs_by_genre[new_genre] = []
-                    songs_by_genre[new_genre].append(song)
-                    genre_counts[new_genre] = len(songs_by_genre[new_genre])
-                else:
-                    songs_by_genre[genre].append(song)
-
-        print("Finished processing songs. Creating tables...")
+    # Spotify playlists hold at most this many tracks
+    PLAYLIST_SIZE = 11000
 
-        # Create a new table for each genre
-        for genre, songs in songs_by_genre.items():
-            table_name = genre.replace(" ", "_")
+    def get_songs_split_by_genre(self):
+        """
+        Split the songs of spotify_data_songs into playlist tables per genre of at most PLAYLIST_SIZE songs.
+        The first chunk of a genre goes to the table named after the genre, the next ones to genre_1,
+        genre_2, ... (spaces replaced by underscores).
+        Runs on the server and is incremental: the genre_assignments table remembers the chunk of
+        every song, so a rerun only numbers the songs that were added (or got a genre) since,
+        filling up the last chunk of their genre before starting a new one.
+        """
+        try:
+            with self.db.transaction() as cur:
+                cur.execute("SELECT to_regclass('genre_assignments') IS NULL")
+                first_run = cur.fetchone()[0]
+                cur.execute(
+                    """CREATE TABLE IF NOT EXISTS genre_assignments(
+                    track_id VARCHAR(255) PRIMARY KEY,
+                    genre VARCHAR(255) NOT NULL,
+                    chunk INT NOT NULL
+                    )
+                    """
+                )
+                # Playlist tables made before genre_assignments existed keep the songs they already hold
+                seeded = self._seed_genre_assignments(cur) if first_run else []
+                cur.execute(
+                    """
+                    WITH chunks AS (
+                        SELECT genre, chunk, COUNT(*) AS fill FROM genre_assignments GROUP BY genre, chunk
+                    ),
+                    placed AS (
+                        -- The position of the last song of the last chunk, in the numbering of the chunks below
+                        SELECT DISTINCT ON (genre) genre,
+                            CASE chunk
+                                WHEN 0 THEN fill
+                                WHEN 1 THEN %(size)s + fill
+                                ELSE chunk * %(size)s + fill - 1
+                            END AS position
+                        FROM chunks
+                        ORDER BY genre, chunk DESC
+                    ),
+                    numbered AS (
+                        SELECT s.track_id, s.genre,
+                            COALESCE(p.position, 0)
+                            + row_number() OVER (PARTITION BY s.genre ORDER BY s.id, s.track_id) AS n
+                        FROM spotify_data_songs s
+                        LEFT JOIN placed p ON p.genre = s.genre
+                        WHERE s.genre IS NOT NULL
+                        AND s.track_id IS NOT NULL
+                        AND NOT EXISTS (
+                            SELECT 1 FROM genre_assignments a WHERE a.track_id = s.track_id
+                        )
+                    ),
+                    assigned AS (
+                        INSERT INTO genre_assignments (track_id, genre, chunk)
+                        SELECT track_id, genre, CASE WHEN n <= %(size)s THEN 0 ELSE n / %(size)s END
+                        FROM numbered
+                        RETURNING genre, chunk
+                    )
+                    SELECT genre, chunk, COUNT(*) FROM assigned GROUP BY genre, chunk ORDER BY genre, chunk
+                    """,
+                    {"size": self.PLAYLIST_SIZE},
+                )
+                new_chunks = cur.fetchall()
+                print(
+                    f"Assigned {sum(count for _, _, count in new_chunks)} new songs "
+                    f"to {len(new_chunks)} playlist tables"
+                )
 
-            # Check if the table already exists
-            cursor.execute(f"SELECT to_regclass('{table_name}')")
-            if not cursor.fetchone()[0]:
-                # If the table does not exist, create it
-                try:
-                    cursor.execute(
-                        f'CREATE TABLE "{table_name}" (LIKE spotify_data_songs INCLUDING ALL)',
+                for genre, chunk in sorted({*seeded, *((genre, chunk) for genre, chunk, _ in new_chunks)}):
+                    name = self._chunk_table_name(genre, chunk)
+                    table = sql.Identifier(name)
+                    cur.execute(
+                        sql.SQL("CREATE TABLE IF NOT EXISTS {} (LIKE spotify_data_songs INCLUDING ALL)").format(table)
                     )
-                    cursor.execute(
-                        f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{table_name}_unique_track_id" UNIQUE (track_id)',
+                    # Drop songs that belong to another chunk, so no playlist holds a song twice or overflows
+                    cur.execute(
+                        sql.SQL(
+                            """
+                            DELETE FROM {} t
+                            WHERE NOT EXISTS (
+                                SELECT 1 FROM genre_assignments a
+                                WHERE a.track_id = t.track_id AND a.genre = %s AND a.chunk = %s
+                            )
+                            """
+                        ).format(table),
+                        (genre, chunk),
                     )
-                    self.conn.commit()  # Commit after creating table
-                    print(f"Created table for genre {genre}.")
-                except Exception as e:
-                    print(f"Failed to create table for genre {genre}. Error: {e}")
-                    self.conn.rollback()
-
-                # Insert the songs into the table, updating existing songs
-                values = [
-                    tuple(str(song[column])[:255] for column in columns)
-                    for song in songs
-                ]  # Truncate the string to 255 characters
-                insert_sql = f'INSERT INTO "{table_name}" VALUES ({", ".join(["%s"] * len(values[0]))}) ON CONFLICT (track_id) DO UPDATE SET {", ".join([f"{column} = EXCLUDED.{column}" for column in columns])}'
-                try:
-                    cursor.executemany(insert_sql, values)
-                    self.conn.commit()  # Commit after inserting songs
-                    print(f"Inserted songs into table for genre {genre}.")
-                except Exception as e:
-                    print(
-                        f"Failed to insert songs into table for genre {genre}. Error: {e}"
+                    if cur.rowcount:
+                        print(f"Removed {cur.rowcount} songs of other chunks from table {name}.")
+                    cur.execute(
+                        sql.SQL(
+                            """
+                            INSERT INTO {}
+                            SELECT s.* FROM spotify_data_songs s
+                            JOIN genre_assignments a ON a.track_id = s.track_id
+                            WHERE a.genre = %s AND a.chunk = %s
+                            ON CONFLICT (track_id) DO NOTHING
+                            """
+                        ).format(table),
+                        (genre, chunk),
                     )
-                    self.conn.rollback()
+                    print(f"Inserted {cur.rowcount} songs into table {name}.")
+        except Exception as e:
+            print(f"Error in splitting songs by genre: {e}")
 
         print("Finished committing changes to the database.")
 
+    @staticmethod
+    def _chunk_table_name(genre: str, chunk: int) -> str:
+        return (genre if chunk == 0 else f"{genre}_{chunk}").replace(" ", "_")
+
+    def _seed_genre_assignments(self, cur) -> List[Tuple[str, int]]:
+        """
+        Fill a new genre_assignments table from the playlist tables that already exist.
+        Chunks are read in order, so a song found in several tables is assigned to the first one.
+        Returns the (genre, chunk) pairs that were seeded.
+        """
+        cur.execute("SELECT DISTINCT genre FROM spotify_data_songs WHERE genre IS NOT NULL")
+        genres = [row[0] for row in cur.fetchall()]
+        tables = set(self.get_playlist_tables())
+        seeded = []
+        for genre in genres:
+            base = self._chunk_table_name(genre, 0)
+            for table_name in tables:
+                match = re.fullmatch(re.escape(base) + r"(?:_(\d+))?", table_name)
+                if match:
+                    seeded.append((genre, int(match.group(1) or 0)))
+        seeded.sort()
+        for genre, chunk in seeded:
+            cur.execute(
+                sql.SQL(
+                    """
+                    INSERT INTO genre_assignments (track_id, genre, chunk)
+                    SELECT track_id, %s, %s FROM {} WHERE track_id IS NOT NULL
+                    ON CONFLICT (track_id) DO NOTHING
+                    """
+                ).format(sql.Identifier(self._chunk_table_name(genre, chunk))),
+                (genre, chunk),
+            )
+        if seeded:
+            print(f"Seeded genre_assignments from {len(seeded)} existing playlist tables")
+        return seeded
+
     def get_playlist_tables(self):
         """
         Get the names of the tables that store the playlists
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_catalog = 'scrapy_hardwax'
-            AND table_schema = 'public'
-            AND table_name != 'spotify_data_songs' 
-            AND table_name != 'spotify_data_albums' 
-            AND table_name != 'music_albums'
-            AND table_name != 'music_albums_unique'
-            AND table_name != 'labels'
-            """
-        )
-        tables = cursor.fetchall()
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                SELECT table_name
+                FROM information_schema.tables
+                WHERE table_catalog = 'scrapy_hardwax'
+                AND table_schema = 'public'
+                AND table_name != 'spotify_data_songs' 
+                AND table_name != 'spotify_data_albums' 
+                AND table_name != 'music_albums'
+                AND table_name != 'music_albums_unique'
+                AND table_name != 'labels'
+                AND table_name != 'etl_state'
+                AND table_name != 'genre_assignments'
+                AND table_name != 'playlist_snapshots'
+                """
+            )
+            tables = cur.fetchall()
         return [table[0] for table in tables]
 
-    def select_playlist(self, table_name):
+    def select_playlist(self, table_name) -> Iterator[str]:
         """
-        Select all the rows from a playlist table
+        Stream the track IDs of a playlist table
         """
-        cursor = self.conn.cursor()
-        cursor.execute(f'SELECT * FROM "{table_name}"')
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
-        return [dict(zip(columns, row)) for row in rows]
+        query = sql.SQL("SELECT track_id FROM {} WHERE id IS NOT NULL").format(
+            sql.Identifier(table_name)
+        )
+        for row in self._stream(query):
+            yield row.track_id
 
     def create_and_populate_playlist(self, table_name, track_ids):
         """
@@ -713,7 +1053,7 @@ class SpotifyClass:
         """
         # Create a new playlist
         playlist_name = "hardwax_" + table_name
-        playlist = self.sp.user_playlist_create(self.sp.me()["id"], playlist_name)
+        playlist = self.sp.user_playlist_create(self.user_id, playlist_name)
         print(f"Created playlist with ID: {playlist['id']}")  # print the playlist ID
 
         # Validate track_ids and convert them to URIs
@@ -736,3 +1076,184 @@ class SpotifyClass:
         self.sp.playlist_change_details(playlist["id"], description=description)
 
         return playlist
+
+    def find_playlists(self) -> Dict[str, str]:
+        """
+        Return {name: playlist_id} for the playlists owned by the current user.
+        Fetched once; when several playlists have the same name the most recent one is used.
+        """
+        if self.playlists is None:
+            user_id = self.user_id
+            self.playlists = {}
+            page = self.sp.current_user_playlists(limit=50)
+            while page:
+                for playlist in page["items"]:
+                    if playlist["owner"]["id"] == user_id:
+                        self.playlists.setdefault(playlist["name"], playlist["id"])
+                page = self.sp.next(page) if page["next"] else None
+        return self.playlists
+
+    def get_playlist_track_ids(self, playlist_id) -> List[str]:
+        """
+        Return the track IDs that are in a Spotify playlist.
+        """
+        track_ids = []
+        page = self.sp.playlist_items(
+            playlist_id, fields="items(track(id)),next", limit=100, additional_types=("track",)
+        )
+        while page:
+            track_ids.extend(
+                item["track"]["id"] for item in page["items"] if item["track"] and item["track"]["id"]
+            )
+            page = self.sp.next(page) if page["next"] else None
+        return track_ids
+
+    def make_playlist_snapshots_table(self):
+        """
+        Makes the playlist_snapshots table, which keeps the state of every playlist after its last sync.
+        Called once before the playlists are synced, not by every worker.
+        """
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS playlist_snapshots (
+                    name VARCHAR(255) PRIMARY KEY,
+                    playlist_id VARCHAR(255) NOT NULL,
+                    snapshot_id VARCHAR(255) NOT NULL,
+                    track_ids TEXT[] NOT NULL,
+                    synced_at TIMESTAMP NOT NULL DEFAULT now()
+                )
+                """
+            )
+
+    def load_playlist_snapshot(self, name):
+        """
+        Return the stored (playlist_id, snapshot_id, track_ids) of a playlist, or None.
+        Database errors are raised, so a failed load is not mistaken for a playlist without a snapshot.
+        """
+        with self.db.transaction(cursor_factory=NamedTupleCursor) as cur:
+            cur.execute(
+                "SELECT playlist_id, snapshot_id, track_ids FROM playlist_snapshots WHERE name = %s",
+                (name,),
+            )
+            return cur.fetchone()
+
+    def save_playlist_snapshot(self, name, playlist_id, snapshot_id, track_ids):
+        """
+        Store the state of a playlist after a successful sync.
+        Database errors are raised, so publish_playlists reports the playlist as failed.
+        """
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                INSERT INTO playlist_snapshots (name, playlist_id, snapshot_id, track_ids, synced_at)
+                VALUES (%s, %s, %s, %s, now())
+                ON CONFLICT (name) DO UPDATE SET
+                    playlist_id = EXCLUDED.playlist_id,
+                    snapshot_id = EXCLUDED.snapshot_id,
+                    track_ids = EXCLUDED.track_ids,
+                    synced_at = EXCLUDED.synced_at
+                """,
+                (name, playlist_id, snapshot_id, track_ids),
+            )
+
+    def get_snapshot_id(self, playlist_id) -> str:
+        return self.sp.playlist(playlist_id, fields="snapshot_id")["snapshot_id"]
+
+    def sync_playlist(self, table_name, track_ids):
+        """
+        Make the hardwax_<table_name> playlist contain exactly the given tracks.
+        The playlist ID and contents after the last sync are kept in playlist_snapshots:
+        as long as the playlist's snapshot_id on Spotify is unchanged the diff is made against
+        that copy, and the remote contents are only read when the playlist was changed elsewhere.
+        Without a snapshot the playlist is looked up by name and only created when it does not exist yet.
+        Only the tracks that were added to or removed from the table are sent to Spotify,
+        and the description is only updated when something changed.
+        The playlist_snapshots table must exist, see make_playlist_snapshots_table.
+        """
+        from spotipy.exceptions import SpotifyException
+
+        playlist_name = "hardwax_" + table_name
+        # Keep the order of the table, without duplicates
+        wanted = list(dict.fromkeys(
+            track_id for track_id in track_ids if re.match("^[a-zA-Z0-9]+$", track_id)
+        ))
+
+        playlist_id = remote = snapshot_id = None
+        created = False
+        snapshot = self.load_playlist_snapshot(playlist_name)
+        if snapshot is not None:
+            try:
+                snapshot_id = self.get_snapshot_id(snapshot.playlist_id)
+                playlist_id = snapshot.playlist_id
+                if snapshot_id == snapshot.snapshot_id:
+                    remote = set(snapshot.track_ids)
+            except SpotifyException as e:
+                print(f"Stored playlist {snapshot.playlist_id} of {playlist_name} is not available: {e}")
+
+        if playlist_id is None:
+            playlist_id = self.find_playlists().get(playlist_name)
+            created = playlist_id is None
+            if created:
+                playlist_id = self.sp.user_playlist_create(self.user_id, playlist_name)["id"]
+                self.playlists[playlist_name] = playlist_id
+                print(f"Created playlist with ID: {playlist_id}")
+                remote = set()
+        if remote is None:
+            print(f"Reading the tracks of {playlist_name} from Spotify")
+            remote = set(self.get_playlist_track_ids(playlist_id))
+
+        wanted_set = set(wanted)
+        added = [f"spotify:track:{track_id}" for track_id in wanted if track_id not in remote]
+        removed = [f"spotify:track:{track_id}" for track_id in remote if track_id not in wanted_set]
+        for i in range(0, len(removed), 100):
+            self.sp.playlist_remove_all_occurrences_of_items(playlist_id, removed[i : i + 100])
+        for i in range(0, len(added), 100):
+            self.sp.playlist_add_items(playlist_id, added[i : i + 100])
+        print(f"Playlist {playlist_name}: {len(added)} tracks added, {len(removed)} removed")
+
+        if added or removed or created:
+            description = f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} check out hardwax.com for more!"
+            self.sp.playlist_change_details(playlist_id, description=description)
+            snapshot_id = None
+        if snapshot_id is None:
+            snapshot_id = self.get_snapshot_id(playlist_id)
+        if snapshot is None or (playlist_id, snapshot_id) != (snapshot.playlist_id, snapshot.snapshot_id):
+            self.save_playlist_snapshot(playlist_name, playlist_id, snapshot_id, wanted)
+        return playlist_id
+
+    def publish_playlists(self, tables=None, workers: int = 4) -> Dict[str, float]:
+        """
+        Sync the playlists of all playlist tables (or the given ones), `workers` playlists at a time.
+        The workers share the client and so its rate limiter, which keeps them within one request budget.
+        The track IDs of every table are streamed from the database.
+        Prints and returns the seconds every playlist took; failed playlists are reported and skipped.
+        """
+        if tables is None:
+            tables = self.get_playlist_tables()
+        # Creating the snapshot table and listing the user's playlists once up front,
+        # so the workers do not all do it
+        self.make_playlist_snapshots_table()
+        self.find_playlists()
+
+        def publish(table):
+            start = time.perf_counter()
+            self.sync_playlist(table, self.select_playlist(table))
+            return time.perf_counter() - start
+
+        timings = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            futures = {pool.submit(publish, table): table for table in tables}
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    timings[table] = future.result()
+                    print(f"Published {table} in {timings[table]:.1f}s")
+                except Exception as e:
+                    print(f"Error in publishing {table}: {e}")
+        print(
+            f"Published {len(timings)} of {len(futures)} playlists in {time.perf_counter() - start:.1f}s"
+            + (f", the slowest took {max(timings.values()):.1f}s" if timings else "")
+        )
+        return timings
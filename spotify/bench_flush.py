@@ -0,0 +1,112 @@
+"""
+
+Benchmark for the album flushes of search_album.
+Replays a run of --batches flushes of 50 albums against a temporary spotify_data_albums table
+(the real table is not touched) in two ways:
+the old flush, which re-sent every result collected so far with one INSERT per album,
+and save_to_database_album, which sends only the new albums in one multi-row insert.
+Prints the flush time at several points of the run; the old one grows with the run, the new one stays flat.
+Uses the DB_* variables from .env.
+
+Usage: python bench_flush.py [--batches 200] [--batch-size 50]
+
+"""
+
+import argparse
+import time
+
+from records import Album
+from SpotifyClass_file import SpotifyClass
+
+
+def old_flush(cur, album_results):
+    """The save_to_database_album loop before checkpoints and bulk inserts."""
+    for album in album_results:
+        cur.execute(
+            """
+            INSERT INTO spotify_data_albums (id, artist, album, album_uri, artist_uri)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (id) DO NOTHING;
+            """,
+            (album.id, album.artist, album.album, album.album_uri, album.artist_uri),
+        )
+
+
+def make_albums(start, count):
+    return [
+        Album(
+            i,
+            f"Artist {i % 997}",
+            f"Album {i}",
+            f"spotify:album:{i:022d}",
+            f"spotify:artist:{i % 997:022d}",
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def reset_table(conn):
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS pg_temp.spotify_data_albums")
+        # A temporary table of the same name shadows the real one for this connection
+        cur.execute(
+            """
+            CREATE TEMP TABLE spotify_data_albums (
+                id INTEGER PRIMARY KEY,
+                checked BOOLEAN DEFAULT FALSE,
+                artist TEXT,
+                album TEXT,
+                album_uri TEXT,
+                artist_uri TEXT
+            )
+            """
+        )
+    conn.commit()
+
+
+def run(conn, flush, batches, batch_size):
+    """Run the flushes and return the time of every flush."""
+    reset_table(conn)
+    timings = []
+    album_results = []
+    for batch in range(batches):
+        new = make_albums(batch * batch_size + 1, batch_size)
+        album_results.extend(new)
+        start = time.perf_counter()
+        with conn.cursor() as cur:
+            flush(cur, new, album_results)
+        conn.commit()
+        timings.append(time.perf_counter() - start)
+    with conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM spotify_data_albums")
+        rows = cur.fetchone()[0]
+    return timings, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    # Only the database connection is used, the Spotify client is never created
+    spotify = SpotifyClass()
+    # The temporary table only exists on one connection, so both runs borrow the same one
+    with spotify.db.connection() as conn:
+        old, old_rows = run(
+            conn, lambda cur, new, everything: old_flush(cur, everything), args.batches, args.batch_size
+        )
+        bulk, bulk_rows = run(
+            conn, lambda cur, new, everything: spotify.save_to_database_album(new, cur), args.batches, args.batch_size
+        )
+    print(f"rows written: old {old_rows}, bulk {bulk_rows}")
+    print(f"{'flush':>6} {'old ms':>9} {'bulk ms':>9}")
+    points = sorted({1, *range(args.batches // 5, args.batches + 1, args.batches // 5 or 1)})
+    for point in points:
+        print(f"{point:>6} {1000 * old[point - 1]:>9.2f} {1000 * bulk[point - 1]:>9.2f}")
+    print(f"{'total':>6} {1000 * sum(old):>9.0f} {1000 * sum(bulk):>9.0f}")
+    spotify.db.close()
+
+
+if __name__ == "__main__":
+    main()
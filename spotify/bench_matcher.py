@@ -0,0 +1,126 @@
+"""
+
+Benchmark for the fuzzy matching of Spotify search results.
+Compares the old per-item fuzzywuzzy loop with matcher.best_match on synthetic search results,
+checks that both pick the same item with the same score, and prints albums/second.
+
+Usage: python bench_matcher.py [--albums 5000] [--results 10]
+
+"""
+
+import argparse
+import random
+import string
+import time
+
+from fuzzywuzzy import fuzz
+
+from matcher import best_match
+from SpotifyClass_file import SpotifyClass
+
+normalize = SpotifyClass._normalize
+
+
+def fuzzywuzzy_match(items, album, artist, threshold=70):
+    """The _find_best_match loop before the batched matcher."""
+    norm_album = normalize(album).lower()
+    norm_artist = normalize(artist).lower()
+    best, best_score = None, 0
+    for item in items:
+        result_album = normalize(item["name"]).lower()
+        result_artist = normalize(item["artists"][0]["name"]).lower()
+        score = (fuzz.ratio(norm_album, result_album) + fuzz.ratio(norm_artist, result_artist)) / 2
+        if score > best_score:
+            best, best_score = item, score
+    if best_score >= threshold:
+        return best, best_score
+    return None, best_score
+
+
+def batched_match(items, album, artist, threshold=70):
+    return best_match(
+        items,
+        normalize(album).lower(),
+        normalize(artist).lower(),
+        [normalize(item["name"]).lower() for item in items],
+        [normalize(item["artists"][0]["name"]).lower() for item in items],
+        threshold,
+    )
+
+
+def fuzzywuzzy_scores(items, norm_album, norm_artist, result_albums, result_artists):
+    """The scoring loop alone, on pre-normalized strings."""
+    best, best_score = None, 0
+    for item, result_album, result_artist in zip(items, result_albums, result_artists):
+        score = (fuzz.ratio(norm_album, result_album) + fuzz.ratio(norm_artist, result_artist)) / 2
+        if score > best_score:
+            best, best_score = item, score
+    return best, best_score
+
+
+def prenormalize(items, album, artist):
+    return (
+        items,
+        normalize(album).lower(),
+        normalize(artist).lower(),
+        [normalize(item["name"]).lower() for item in items],
+        [normalize(item["artists"][0]["name"]).lower() for item in items],
+    )
+
+
+def mutate(text, rng):
+    chars = list(text)
+    for _ in range(rng.randint(0, 4)):
+        position = rng.randrange(len(chars) + 1)
+        if rng.random() < 0.5 and position < len(chars):
+            del chars[position]
+        else:
+            chars.insert(position, rng.choice(string.ascii_letters + " "))
+    return "".join(chars) or "x"
+
+
+def make_searches(count, results, rng):
+    searches = []
+    for i in range(count):
+        album = f"{rng.choice(['Sound', 'Dub', 'Deep', 'Trax'])} {i} (12\")"
+        artist = rng.choice(["Basic Channel", "Rhythm & Sound", "Mónica", "DJ Sprinkles"])
+        items = [
+            {"name": mutate(album, rng), "artists": [{"name": mutate(artist, rng)}]}
+            for _ in range(results)
+        ]
+        searches.append((items, album, artist))
+    return searches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--albums", type=int, default=5000)
+    parser.add_argument("--results", type=int, default=10)
+    args = parser.parse_args()
+
+    searches = make_searches(args.albums, args.results, random.Random(1))
+    outputs = {}
+    print("including normalization:")
+    for name, func in (("fuzzywuzzy loop", fuzzywuzzy_match), ("batched matcher", batched_match)):
+        start = time.perf_counter()
+        outputs[name] = [func(*search) for search in searches]
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<16} {elapsed:>7.2f}s {args.albums / elapsed:>9.0f} albums/s")
+
+    print("scoring only, pre-normalized strings:")
+    prepared = [prenormalize(*search) for search in searches]
+    for name, func in (("fuzzywuzzy loop", fuzzywuzzy_scores), ("batched matcher", best_match)):
+        start = time.perf_counter()
+        for search in prepared:
+            func(*search)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<16} {elapsed:>7.2f}s {args.albums / elapsed:>9.0f} albums/s")
+    same = all(
+        (a is b or a == b) and score_a == score_b
+        for (a, score_a), (b, score_b) in zip(*outputs.values())
+    )
+    print("same best match and score:", same)
+
+
+if __name__ == "__main__":
+    main()
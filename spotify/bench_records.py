@@ -0,0 +1,84 @@
+"""
+
+Memory benchmark for the album and track records.
+Builds a synthetic catalogue (by default 50,000 albums with 10 tracks each, 500,000 tracks) twice:
+as the dicts the pipeline used before (an album dict per found album with its tracks as
+{"name", "id"} dicts under "searched_tracks") and as records.Album / records.Track.
+The strings are created once up front and shared by both, so the numbers are the memory of the
+containers themselves, measured with tracemalloc.
+
+Usage: python bench_records.py [--albums 50000] [--tracks-per-album 10]
+
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from records import Album, Track
+
+
+def make_strings(albums, tracks_per_album):
+    album_fields = [
+        (i, f"Artist {i % 5000}", f"Album {i}", f"spotify:album:{i:022d}", f"spotify:artist:{i % 5000:022d}")
+        for i in range(1, albums + 1)
+    ]
+    track_fields = [
+        [(f"Track {i}-{t}", f"{i:017d}{t:05d}") for t in range(tracks_per_album)]
+        for i in range(1, albums + 1)
+    ]
+    return album_fields, track_fields
+
+
+def as_dicts(album_fields, track_fields):
+    return [
+        {
+            "id": id,
+            "checked": False,
+            "artist": artist,
+            "album": album,
+            "album_uri": album_uri,
+            "artist_uri": artist_uri,
+            "searched_tracks": [{"name": name, "id": track_id} for name, track_id in tracks],
+        }
+        for (id, artist, album, album_uri, artist_uri), tracks in zip(album_fields, track_fields)
+    ]
+
+
+def as_records(album_fields, track_fields):
+    tracks = []
+    for fields, album_tracks in zip(album_fields, track_fields):
+        album = Album(*fields)
+        tracks.extend(Track(album, name, track_id) for name, track_id in album_tracks)
+    return tracks
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--albums", type=int, default=50000)
+    parser.add_argument("--tracks-per-album", type=int, default=10)
+    args = parser.parse_args()
+
+    album_fields, track_fields = make_strings(args.albums, args.tracks_per_album)
+    tracks = args.albums * args.tracks_per_album
+    dicts = measure(as_dicts, album_fields, track_fields)
+    records = measure(as_records, album_fields, track_fields)
+    print(f"{args.albums} albums, {tracks} tracks (strings excluded)")
+    print(f"{'layout':<8} {'MB':>8} {'bytes/track':>12}")
+    for name, size in (("dicts", dicts), ("records", records)):
+        print(f"{name:<8} {size / 1e6:>8.1f} {size / tracks:>12.0f}")
+    print(f"records use {records / dicts:.0%} of the memory of dicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+
+Benchmark for SpotifyClass.search_album against a local mock Spotify server.
+The server answers /v1/search with a fixed latency, so the script shows how many albums per second
+the search engine handles at different concurrency levels without touching the real API or the database.
+
+Usage: python bench_search_album.py [--albums 200] [--latency 0.05] [--levels 1,2,4,8,16]
+
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+import spotipy
+
+from records import Album
+from SpotifyClass_file import SpotifyClass
+from search_cache import SearchCache
+
+
+class MockSpotifyHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        # Every third album is only found by the broad fallback search
+        if query.startswith("album:"):
+            album, artist = query[len("album:") :].split(" artist:")
+            number = int(album.rsplit(" ", 1)[1])
+            items = [] if number % 3 == 0 else [self._item(album, artist)]
+        else:
+            artist, album = query.split(" Album ")
+            items = [self._item(f"Album {album}", artist)]
+        body = json.dumps({"albums": {"items": items}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _item(album, artist):
+        return {
+            "name": album,
+            "uri": f"spotify:album:{abs(hash(album))}",
+            "artists": [{"name": artist, "uri": f"spotify:artist:{abs(hash(artist))}"}],
+        }
+
+    def log_message(self, *args):
+        pass
+
+
+class MockSpotifyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class BenchSpotifyClass(SpotifyClass):
+    """SpotifyClass that talks to the mock server and keeps results in memory."""
+
+    def __init__(self, prefix, albums):
+        # Nothing is connected until it is used, so only the mock client and in-memory cache are set up
+        super().__init__()
+        self.sp = spotipy.Spotify(auth="mock-token")
+        self.sp.prefix = prefix
+        self.sp._session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=64))
+        self.search_cache = SearchCache(":memory:")
+        self.music_albums_unique = albums
+        self.album_results = []
+        self.checked = []
+
+    def _commit_album_batch(self, albums, checked_ids):
+        self.album_results.extend(albums)
+        self.checked.extend(checked_ids)
+        return True
+
+
+def make_albums(count):
+    return [Album(i, f"Artist {i % 97}", f"Album {i}") for i in range(1, count + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--albums", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--levels", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    MockSpotifyHandler.latency = args.latency
+    server = MockSpotifyServer(("127.0.0.1", 0), MockSpotifyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    prefix = f"http://127.0.0.1:{server.server_address[1]}/v1/"
+
+    baseline = None
+    print(f"{'concurrency':>11} {'seconds':>8} {'albums/s':>9}  same as sequential")
+    for level in [int(x) for x in args.levels.split(",")]:
+        # search_album fills in the URIs of the albums it finds, so every run gets new records
+        albums = make_albums(args.albums)
+        spotify = BenchSpotifyClass(prefix, albums)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            spotify.search_album(concurrency=level, use_catalogue_index=False)
+        elapsed = time.perf_counter() - start
+        result = (spotify.album_results, spotify.checked)
+        if baseline is None:
+            baseline = result
+        print(f"{level:>11} {elapsed:>8.2f} {len(albums) / elapsed:>9.1f}  {result == baseline}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+
+Startup benchmark for the entry scripts of the spotify folder.
+Runs the start of every script (its imports and `SpotifyClass()`, not the job itself) in a fresh
+Python process, and prints the wall time of that process and what was set up on the way:
+whether the database pool was opened, whether the Spotify client was created and whether
+spotipy was imported at all. Database-only scripts should do none of that.
+
+Usage: python bench_startup.py [--repeat 5] [scripts ...]
+
+"""
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+SCRIPTS = [
+    "search_albums.py",
+    "search_songs.py",
+    "make_playlist_tables.py",
+    "playlist.py",
+    "reset_not_found_albums.py",
+]
+
+PROBE = """
+import json, sys
+namespace = {"__name__": "__startup__"}
+exec(compile(sys.argv[1], sys.argv[2], "exec"), namespace)
+spotify = next(value for value in namespace.values() if type(value).__name__ == "SpotifyClass")
+print(json.dumps({
+    "database": spotify._db is not None and spotify._db._pool is not None,
+    "spotify": spotify._sp is not None,
+    "spotipy imported": "spotipy" in sys.modules,
+}))
+"""
+
+
+def startup_source(path: Path) -> str:
+    """
+    Return the source of a script up to and including the statement that creates SpotifyClass().
+    """
+    source = path.read_text()
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            if getattr(node.value.func, "id", None) == "SpotifyClass":
+                return "\n".join(source.splitlines()[: node.end_lineno])
+    raise ValueError(f"{path.name} does not create a SpotifyClass")
+
+
+def run(script: str, repeat: int):
+    source = startup_source(HERE / script)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, source, script],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _timed(command):
+    start = time.perf_counter()
+    subprocess.run(command, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = statistics.median(
+        _timed([sys.executable, "-c", "pass"]) for _ in range(args.repeat)
+    )
+    print(f"empty python process: {1000 * baseline:.0f} ms")
+    print(f"{'script':<26} {'ms':>6}  {'database':<9} {'spotify':<8} spotipy imported")
+    for script in args.scripts:
+        elapsed, state = run(script, args.repeat)
+        print(
+            f"{script:<26} {1000 * elapsed:>6.0f}  {str(state['database']):<9} "
+            f"{str(state['spotify']):<8} {state['spotipy imported']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+
+Local index of Spotify discographies for artists that were already resolved.
+Once one album of an artist is found we know its artist_uri, so the other albums by that artist can be
+matched in memory against the artist's discography instead of with two search calls each.
+Discographies are fetched lazily, once per artist, with paginated artist_albums calls.
+
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from normalize import normalize
+
+
+class CatalogueIndex:
+    def __init__(self, sp, country: str = "BE", max_albums: int = 500):
+        self.sp = sp
+        self.country = country
+        # Artists with bigger discographies (e.g. "Various Artists") are left to the search
+        self.max_albums = max_albums
+        self.artist_uris: Dict[str, str] = {}
+        self.discographies: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+        self.hits = 0
+        self._locks = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(artist: str) -> str:
+        return normalize(artist).lower()
+
+    def add_artist(self, artist: str, artist_uri: str):
+        """
+        Remember the Spotify artist_uri of an artist name from music_albums.
+        """
+        if artist and artist_uri:
+            self.artist_uris.setdefault(self._key(artist), artist_uri)
+
+    def record_hit(self):
+        """
+        Count an album that was matched against a discography; called from the search workers.
+        """
+        with self._lock:
+            self.hits += 1
+
+    def discography(self, artist: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the albums of an already resolved artist, or None if the artist is unknown.
+        """
+        artist_uri = self.artist_uris.get(self._key(artist))
+        if artist_uri is None:
+            return None
+        with self._lock:
+            lock = self._locks[artist_uri]
+        # One fetch per artist, even when several workers ask for it at the same time
+        with lock:
+            if artist_uri not in self.discographies:
+                self.discographies[artist_uri] = self._fetch(artist_uri)
+        return self.discographies[artist_uri]
+
+    def _fetch(self, artist_uri: str) -> Optional[List[Dict[str, Any]]]:
+        albums = []
+        page = self.sp.artist_albums(
+            artist_uri,
+            include_groups="album,single,compilation",
+            country=self.country,
+            limit=50,
+        )
+        while True:
+            albums.extend(page["items"])
+            if len(albums) > self.max_albums:
+                return None
+            if not page["next"]:
+                return albums
+            page = self.sp.next(page)
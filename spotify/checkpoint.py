@@ -0,0 +1,77 @@
+"""
+
+Checkpointed progress for long search runs.
+Results are collected together with the ids of the rows they belong to, and both are handed to a
+write function that saves them and marks the ids as checked in one transaction.
+A run that crashes therefore loses nothing that was committed, and the next run resumes with the rows
+that are still unchecked. Every flush only sends what was added since the previous one.
+A failed write leaves its ids unchecked for the next run; after max_failures failed writes in a row
+the run is stopped, instead of searching on for results that cannot be saved.
+
+"""
+
+import time
+from typing import Any, Callable, List
+
+
+class Checkpoint:
+    def __init__(
+        self,
+        write: Callable[[List[Any], List[int]], bool],
+        batch_size: int = 50,
+        interval: float = 30.0,
+        max_failures: int = 3,
+    ):
+        # write(results, ids) must save the results and mark the ids as done in one transaction,
+        # and return whether that transaction was committed
+        self.write = write
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_failures = max_failures
+        self.failures = 0
+        self.results: List[Any] = []
+        self.ids: List[int] = []
+        self.committed = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, id: int, results=()):
+        """
+        Record that `id` was processed, with the results it produced.
+        Flushes once batch_size ids are pending or interval seconds passed since the last flush.
+        """
+        self.ids.append(id)
+        self.results.extend(results)
+        if (
+            len(self.ids) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Write the pending results and ids, then start a new batch.
+        Raises RuntimeError once max_failures writes in a row have failed.
+        """
+        ids = self.ids
+        if ids:
+            succeeded = self.write(self.results, ids)
+        self.results = []
+        self.ids = []
+        self._last_flush = time.monotonic()
+        if not ids:
+            return
+        if succeeded:
+            self.committed += len(ids)
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            raise RuntimeError(f"{self.failures} checkpoint writes failed in a row, stopping the run")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Also on errors and Ctrl-C: everything that was processed so far is kept
+        self.flush()
+        return False
@@ -0,0 +1,100 @@
+"""
+
+Small data-access layer for the Spotify jobs.
+Connections come from a thread-safe pool, so every thread (search workers, the track writer,
+playlist publishers) works on a connection of its own.
+transaction() is one unit of work: any number of statements on one cursor with a single commit,
+or a rollback when something fails. stream() reads large results through a server-side cursor.
+
+"""
+
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import STATUS_READY
+from psycopg2.extras import NamedTupleCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class Database:
+    # A search job streams its unchecked rows on one connection and commits its checkpoints on another
+    MIN_SIZE = 2
+
+    def __init__(self, size: int = 10, **connect_kwargs):
+        if size < self.MIN_SIZE:
+            raise ValueError(f"The connection pool needs at least {self.MIN_SIZE} connections, got {size}")
+        self.size = size
+        self.connect_kwargs = connect_kwargs
+        self._pool = None
+        self._lock = threading.Lock()
+        # ThreadedConnectionPool raises when it is exhausted, so callers wait for a free slot instead
+        self._slots = threading.BoundedSemaphore(size)
+
+    @property
+    def pool(self) -> ThreadedConnectionPool:
+        """
+        The connection pool, opened on first use.
+        """
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    try:
+                        self._pool = ThreadedConnectionPool(1, self.size, **self.connect_kwargs)
+                        print("Database connected")
+                    except OperationalError as e:
+                        print(f"The error '{e}' occurred")
+                        raise
+        return self._pool
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection from the pool, waiting while all of them are in use.
+        The connection goes back without an open transaction.
+        """
+        with self._slots:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+            finally:
+                if not conn.closed and conn.status != STATUS_READY:
+                    conn.rollback()
+                self.pool.putconn(conn, close=bool(conn.closed))
+
+    @contextmanager
+    def transaction(self, cursor_factory=None):
+        """
+        Yield a cursor for one unit of work, committed at the end or rolled back on any error.
+        """
+        with self.connection() as conn:
+            try:
+                with conn.cursor(cursor_factory=cursor_factory) as cur:
+                    yield cur
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def stream(self, query, params=None, chunk_size: int = 2000) -> Iterator[tuple]:
+        """
+        Yield the rows of a query as namedtuples through a named server-side cursor,
+        chunk_size at a time, so memory stays flat however big the result is.
+        The cursor keeps its own connection until the rows are consumed or the generator is closed.
+        """
+        with self.connection() as conn:
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=NamedTupleCursor) as cur:
+                cur.itersize = chunk_size
+                cur.execute(query, params)
+                yield from cur
+            conn.commit()
+
+    def close(self):
+        """
+        Close all connections of the pool.
+        """
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
@@ -0,0 +1,49 @@
+"""
+
+Batched fuzzy matching of Spotify search results.
+All candidates of a search are scored against the query in a single rapidfuzz call instead of
+two fuzz.ratio calls per item, with the same scores as fuzzywuzzy's fuzz.ratio.
+
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from rapidfuzz.distance import Indel
+from rapidfuzz.process import cpdist
+
+
+def ratio_matrix(queries: List[str], candidates: List[List[str]]) -> np.ndarray:
+    """
+    Score candidates[i][j] against queries[i] for every i and j in one batched call.
+    Returns an (len(queries), len(candidates[0])) matrix of fuzz.ratio scores:
+    100 * the normalized Indel similarity (what python-Levenshtein's ratio computes),
+    rounded half to even like fuzzywuzzy's int(round(...)).
+    """
+    count = len(candidates[0])
+    repeated = [query for query in queries for _ in range(count)]
+    flat = [candidate for row in candidates for candidate in row]
+    similarity = cpdist(repeated, flat, scorer=Indel.normalized_similarity, dtype=np.float64)
+    return np.rint(100 * similarity).reshape(len(queries), count)
+
+
+def best_match(
+    items: List[Dict[str, Any]],
+    norm_album: str,
+    norm_artist: str,
+    result_albums: List[str],
+    result_artists: List[str],
+    threshold: int = 70,
+) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Return the first item with the highest (album ratio + artist ratio) / 2 score and that score,
+    or (None, score) if it is below the threshold. Queries and results must already be normalized.
+    """
+    if not items:
+        return None, 0
+    scores = ratio_matrix([norm_album, norm_artist], [result_albums, result_artists]).mean(axis=0)
+    index = int(np.argmax(scores))
+    best_score = float(scores[index])
+    if best_score > 0 and best_score >= threshold:
+        return items[index], best_score
+    return None, best_score
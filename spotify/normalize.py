@@ -0,0 +1,69 @@
+"""
+
+Text normalization for Spotify search matching.
+normalize() gives the same result as the original SpotifyClass._normalize, but with precompiled patterns,
+a translate-table fast path for ASCII and Latin text, and a bounded LRU cache, because the same
+artist names and search results are normalized over and over during a search_album run.
+
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict
+
+CACHE_SIZE = 65536
+
+_PARENTHESES = re.compile(r"\s*\(.*?\)\s*")
+_BRACKETS = re.compile(r"\s*\[.*?\]\s*")
+
+# Characters whose NFKD decomposition is independent of their neighbours and fits in a translate table:
+# Latin-1 Supplement and Latin Extended-A, mapped to their decomposition without combining marks
+_TRANSLATE_LIMIT = 0x180
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+_ACCENTS = {
+    code: _strip_accents(chr(code))
+    for code in range(0x80, _TRANSLATE_LIMIT)
+    if _strip_accents(chr(code)) != chr(code)
+}
+
+
+def _normalize(text: str) -> str:
+    # Decompose unicode and strip accent marks; ASCII text is never changed by this
+    if not text.isascii():
+        if max(text) < chr(_TRANSLATE_LIMIT):
+            text = text.translate(_ACCENTS)
+        else:
+            text = _strip_accents(text)
+    # Remove parenthetical suffixes like (Deluxe Edition), (Remaster), (12")
+    if "(" in text:
+        text = _PARENTHESES.sub(" ", text)
+    # Remove bracketed suffixes like [Remastered]
+    if "[" in text:
+        text = _BRACKETS.sub(" ", text)
+    # Collapse whitespace; str.split() splits on exactly the characters \s matches
+    return " ".join(text.split())
+
+
+normalize = lru_cache(maxsize=CACHE_SIZE)(_normalize)
+normalize.__doc__ = "Normalize a string for better Spotify search matching."
+
+
+def normalize_stats() -> Dict[str, float]:
+    """
+    Return the hit/miss statistics of the normalize() cache.
+    """
+    info = normalize.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
@@ -2,10 +2,14 @@
 
 With this script we can create a playlist in Spotify for each table in the database. 
 We can create a playlist for each genre and populate it with the songs that are in the 'genre_suffix' table. The playlist will be named after the genre.
+Existing playlists are reused: only the songs that were added to or removed from the table are sent to Spotify.
 After the playlist is changed the descritpion will be updated with the date in the playlist.
 It is important to note that the Spotify API has a limit of 11000 songs per playlist.
+The number of playlists published at the same time can be set with PLAYLIST_CONCURRENCY (default 4).
 """
 
+import os
+
 from SpotifyClass_file import SpotifyClass
 
 spotify = SpotifyClass()
@@ -13,15 +17,7 @@ spotify = SpotifyClass()
 table = spotify.get_playlist_tables()
 print(table)
 
-for x in table:
-    results = spotify.select_playlist(x)
-    print(f"Playlist: {x} - {len(results)} songs found.")
-    print(results[0].keys())
-
-    track_ids = [
-        result.get("track_id") for result in results if result.get("id") is not None
-    ]
-    # Create and populate a Spotify playlist for each table
-    spotify.create_and_populate_playlist(x, track_ids)
+# Create or update the Spotify playlist of each table
+spotify.publish_playlists(table, workers=int(os.getenv("PLAYLIST_CONCURRENCY", "4")))
 
 print("Done.")
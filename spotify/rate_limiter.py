@@ -0,0 +1,151 @@
+"""
+
+Shared rate limiting for the Spotify Web API.
+Every call made through RateLimitedSpotify takes a token from one RateLimiter, so all worker threads
+are paced together and back off together when Spotify answers with a 429.
+
+"""
+
+import threading
+import time
+
+import requests
+import spotipy
+from urllib3.util.retry import Retry
+
+
+class RateLimiter:
+    """
+    Token bucket that paces requests to `rate` per second with bursts of up to `burst` requests.
+    A 429 pauses every caller until its Retry-After has passed and halves the rate once per pause;
+    each successful call then adds `recovery` requests/second back, up to the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        min_rate: float = 0.5,
+        recovery: float = 0.05,
+        max_retries: int = 5,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.max_retries = max_retries
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    elapsed = now - self._updated
+                    self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, retry_after: float):
+        """
+        Pause all callers for `retry_after` seconds and slow down the pace.
+        """
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            # 429s of requests that were in flight when the limit was hit belong to the same event
+            if now >= self._blocked_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            until = now + retry_after
+            if until > self._blocked_until:
+                # Start from an empty bucket so the pause is not followed by a burst
+                self._blocked_until = until
+                self._tokens = 0.0
+                self._updated = until
+
+    def success(self):
+        """
+        Speed the pace back up after a successful call.
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery)
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call `func` once a token is available, retrying it after a 429.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except spotipy.exceptions.SpotifyException as e:
+                if e.http_status != 429 or attempt == self.max_retries:
+                    raise
+                retry_after = self._retry_after(e, attempt)
+                print(f"Rate limit exceeded. Waiting {retry_after:.0f}s...")
+                self.backoff(retry_after)
+                continue
+            self.success()
+            return result
+
+    @staticmethod
+    def _retry_after(error, attempt: int) -> float:
+        headers = error.headers or {}
+        try:
+            return float(headers["Retry-After"])
+        except (KeyError, TypeError, ValueError):
+            return float(2**attempt)
+
+
+def make_session(retries: int = 3) -> requests.Session:
+    """
+    Build a requests session for spotipy that retries server errors but hands 429s back to the caller,
+    so they reach the shared RateLimiter instead of being slept on per request.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status_forcelist=(500, 502, 503, 504),
+        backoff_factor=0.3,
+        respect_retry_after_header=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(max_retries=retry, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RateLimitedSpotify:
+    """
+    Wraps a spotipy.Spotify client so that every API method goes through a shared RateLimiter.
+    """
+
+    def __init__(self, client: spotipy.Spotify, limiter: RateLimiter):
+        self._client = client
+        self.limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def limited(*args, **kwargs):
+            return self.limiter.call(attr, *args, **kwargs)
+
+        return limited
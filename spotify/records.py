@@ -0,0 +1,42 @@
+"""
+
+Compact in-memory records for the albums and tracks the Spotify pipeline works with.
+Slotted dataclasses need a fraction of the memory of the dicts used before, and a Track points to
+its Album instead of copying the album's fields.
+
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(slots=True)
+class Album:
+    # A row of music_albums_unique or spotify_data_albums; the URIs are set once the album is found
+    id: int
+    artist: str
+    album: str
+    album_uri: Optional[str] = None
+    artist_uri: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Track:
+    album: Album
+    name: str
+    id: str
+
+    @classmethod
+    def from_spotify(cls, album: Album, track: Dict[str, Any]) -> "Track":
+        """
+        Keep only the name and id of a track object from the Spotify API.
+        """
+        return cls(album, track.get("name"), track.get("id"))
+
+    def row(self) -> Tuple:
+        """
+        Return the track as a spotify_data_songs row
+        (id, track, track_id, artist, album, album_uri, artist_uri).
+        """
+        album = self.album
+        return (album.id, self.name, self.id, album.artist, album.album, album.album_uri, album.artist_uri)
@@ -7,5 +7,5 @@ With this script, we can reset the 'not_found' column in the 'spotify_data_album
 from SpotifyClass_file import SpotifyClass
 
 spotify = SpotifyClass()
-id = spotify.select_id("spotify_data_albums")
+id = list(spotify.select_id("spotify_data_albums"))
 spotify.reset_not_found(id)
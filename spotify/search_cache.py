@@ -0,0 +1,74 @@
+"""
+
+On-disk cache of raw Spotify search responses.
+Responses are stored in SQLite keyed by the normalized query, the search type and the market,
+so re-runs of search_albums.py (e.g. after reset_not_found_albums.py) are answered locally until the TTL expires.
+
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SearchCache:
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    query TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    market TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (query, type, market)
+                )
+                """
+            )
+        # Expired entries are never read again, so drop them when the cache is opened
+        self.purge_expired()
+
+    def get(self, query: str, type: str, market: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response, or None if it is missing or older than the TTL.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response FROM search_cache WHERE query = ? AND type = ? AND market = ? AND fetched_at >= ?",
+                (query, type, market, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query: str, type: str, market: str, response: Dict[str, Any]):
+        """
+        Store a response, replacing any older entry for the same key.
+        """
+        payload = json.dumps(response, separators=(",", ":"))
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_cache (query, type, market, response, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (query, type, market, payload, time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries older than the TTL and return how many were removed.
+        """
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM search_cache WHERE fetched_at < ?", (time.time() - self.ttl,)
+            )
+            return cur.rowcount
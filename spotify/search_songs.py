@@ -8,9 +8,10 @@ from SpotifyClass_file import SpotifyClass
 
 spotify = SpotifyClass()
 
-spotify_data_albums = spotify.select_table_dict("spotify_data_albums")
-if len(spotify_data_albums) == 0:
+if not spotify.has_unchecked("spotify_data_albums"):
     print("No albums found in the database that still need to be searched.")
     exit()
-result = spotify.search_track(spotify_data_albums=spotify_data_albums)
-spotify.save_to_spotify_data_songs(result)
+spotify_data_albums = spotify.select_unchecked("spotify_data_albums")
+errors = spotify.search_track(spotify_data_albums=spotify_data_albums)
+if errors:
+    print(f"{len(errors)} albums could not be fetched.")